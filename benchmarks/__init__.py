@@ -0,0 +1,98 @@
+"""
+Benchmarks for the BlogIt API.
+
+Every benchmark runs against a throwaway test database created next to the
+configured one, so it never touches real data. Run them from the project root:
+
+    python -m benchmarks.search --posts 1000000
+"""
+import io
+import os
+import statistics
+import time
+from contextlib import contextmanager
+
+import django
+
+
+def setup():
+    """
+    Configure Django for a standalone benchmark script.
+    """
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+    django.setup()
+
+
+@contextmanager
+def test_database(keepdb=False):
+    """
+    Create the test database for the duration of the block.
+    With keepdb the database (and its seeded data) is reused between runs.
+    """
+    from django.db import connection
+
+    old_name = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=keepdb)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=keepdb)
+
+
+def measure(func, repeat):
+    """
+    Call func repeat times and return every duration in seconds.
+    """
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def summarize(durations):
+    """
+    Return p50/p95/p99/mean of durations in milliseconds.
+    """
+    ordered = sorted(durations)
+
+    def percentile(p):
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))] * 1000
+
+    return {
+        "p50": percentile(50),
+        "p95": percentile(95),
+        "p99": percentile(99),
+        "mean": statistics.mean(ordered) * 1000,
+    }
+
+
+def seed_blog(users, posts, tags, comments, workers=1):
+    """
+    Fill the database with the seed_blog command, unless it has the requested
+    size already.
+    """
+    from django.core.management import call_command
+    from taggit.models import Tag
+
+    from blog.models import Comment, Post
+    from user.models import User
+
+    if (
+        User.objects.count() == users
+        and Post.objects.count() == posts
+        and Tag.objects.count() == tags
+        and Comment.objects.count() == comments
+    ):
+        return
+    call_command("flush", interactive=False, verbosity=0)
+    call_command(
+        "seed_blog",
+        users=users,
+        posts=posts,
+        tags=tags,
+        comments=comments,
+        workers=workers,
+        stdout=io.StringIO(),
+    )
@@ -0,0 +1,205 @@
+"""
+Measure latency and queries per request of the main API endpoints.
+
+    python -m benchmarks.api --posts 100000 --comments 500000 --output base.json
+    python -m benchmarks.api --posts 100000 --comments 500000 --compare base.json
+
+Requests go through the full middleware stack with JWT authentication.
+Response caching is disabled except for the feed-cached scenario, and writes
+are rolled back after each scenario.
+"""
+import argparse
+import itertools
+import json
+import subprocess
+import sys
+from datetime import datetime, timezone
+
+from benchmarks import measure, seed_blog, setup, summarize, test_database
+
+
+def run(client, method, urls, repeat, data=None):
+    """
+    Request cycling through urls repeat times, return summary with the mean
+    number of queries per request.
+    """
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    urls = itertools.cycle(urls)
+    queries = []
+
+    def request():
+        with CaptureQueriesContext(connection) as context:
+            response = getattr(client, method)(next(urls), data, format="json")
+        assert response.status_code < 300, (response.status_code, response.data)
+        queries.append(len(context))
+
+    # First request warms up caches and connections.
+    request()
+    queries.clear()
+    result = summarize(measure(request, repeat))
+    result["queries"] = sum(queries) / len(queries)
+    return result
+
+
+def get_scenarios(args):
+    """
+    Return (name, method, urls, data) of every benchmarked request.
+    """
+    from taggit.models import Tag
+
+    from blog.models import Post
+
+    posts = list(Post.objects.filter(is_active=True).order_by("?")[: args.repeat])
+    commented = list(
+        Post.objects.filter(comments_count__gt=0).order_by("-comments_count")[
+            : args.repeat
+        ]
+    )
+    tags = list(Tag.objects.values_list("name", flat=True)[: args.repeat])
+    return (
+        ("feed", "get", ["/api/post/"], None),
+        ("feed-cached", "get", ["/api/post/"], None),
+        ("feed-cursor", "get", ["/api/post/?pagination=cursor"], None),
+        ("tag-cloud", "get", ["/api/tags/", "/api/tags/?search=ba"], None),
+        ("detail", "get", [f"/api/post/{post.id}/" for post in posts], None),
+        ("tag", "get", [f"/api/post/?tags__name={tag}" for tag in tags], None),
+        (
+            "tags-any",
+            "get",
+            [f"/api/post/?tags={a},{b}" for a, b in zip(tags, tags[1:])],
+            None,
+        ),
+        (
+            "comments",
+            "get",
+            [f"/api/post/{post.id}/comments/" for post in commented],
+            None,
+        ),
+        (
+            "post-create",
+            "post",
+            ["/api/post/"],
+            {"title": "title", "description": "text", "tags": ["benchmark"]},
+        ),
+        (
+            "comment-create",
+            "post",
+            [f"/api/post/{post.id}/comments/" for post in posts],
+            {"text": "text"},
+        ),
+    )
+
+
+def compare(results, baseline, threshold):
+    """
+    Print changes against a baseline, return True if any scenario regressed
+    by more than threshold percent.
+    """
+    regressed = False
+    for name, result in results.items():
+        base = baseline["results"].get(name)
+        if base is None:
+            continue
+        changes = []
+        for key in ("p50", "p95", "p99", "queries"):
+            change = (result[key] - base[key]) / base[key] * 100 if base[key] else 0
+            if key == "queries":
+                worse = result[key] > base[key]
+            else:
+                worse = change > threshold
+            regressed |= worse
+            changes.append(f"{key} {change:+.1f}%{' !' if worse else ''}")
+        print(f"{name:>15}: " + ", ".join(changes))
+    return regressed
+
+
+def get_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--posts", type=int, default=10_000)
+    parser.add_argument("--tags", type=int, default=200)
+    parser.add_argument("--comments", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument(
+        "--workers", type=int, default=1, help="Processes seeding the database"
+    )
+    parser.add_argument("--keepdb", action="store_true")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--compare", help="JSON results to compare against")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=10,
+        help="Latency increase in percent counted as a regression",
+    )
+    args = parser.parse_args()
+
+    setup()
+    from django.core.cache import cache
+    from django.db import transaction
+    from django.test.utils import override_settings
+    from rest_framework.test import APIClient
+    from rest_framework_simplejwt.tokens import RefreshToken
+
+    from user.models import User
+
+    results = {}
+    with test_database(keepdb=args.keepdb), override_settings(
+        ALLOWED_HOSTS=["testserver"], BLOG_RESPONSE_CACHE_TIMEOUT=0
+    ):
+        seed_blog(args.users, args.posts, args.tags, args.comments, args.workers)
+        user = User.objects.first()
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f"JWT {RefreshToken.for_user(user).access_token}"
+        )
+
+        for name, method, urls, data in get_scenarios(args):
+            cache.clear()
+            timeout = 300 if name == "feed-cached" else 0
+            with override_settings(BLOG_RESPONSE_CACHE_TIMEOUT=timeout):
+                with transaction.atomic():
+                    results[name] = run(client, method, urls, args.repeat, data)
+                    transaction.set_rollback(True)
+            print(
+                f"{name:>15}: "
+                + ", ".join(
+                    f"{key}={value:.2f}{'' if key == 'queries' else 'ms'}"
+                    for key, value in results[name].items()
+                )
+            )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(
+                {
+                    "commit": get_commit(),
+                    "created_at": datetime.now(timezone.utc).isoformat(),
+                    "args": vars(args),
+                    "results": results,
+                },
+                f,
+                indent=2,
+            )
+    if args.compare:
+        with open(args.compare) as f:
+            if compare(results, json.load(f), args.threshold):
+                sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
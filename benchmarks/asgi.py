@@ -0,0 +1,123 @@
+"""
+Compare requests per second of the async read views with the WSGI DRF views
+under concurrent load.
+
+    python -m benchmarks.asgi --requests 2000 --concurrency 32
+"""
+import argparse
+import asyncio
+import io
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks import seed_blog, setup, test_database
+
+
+def run_wsgi(path, headers, requests, concurrency):
+    from django.core.wsgi import get_wsgi_application
+
+    application = get_wsgi_application()
+    path, _, query_string = path.partition("?")
+
+    def start_response(status, response_headers):
+        assert status.startswith("200"), status
+
+    def worker(count):
+        for _ in range(count):
+            environ = {
+                "REQUEST_METHOD": "GET",
+                "PATH_INFO": path,
+                "QUERY_STRING": query_string,
+                "SERVER_NAME": "testserver",
+                "SERVER_PORT": "80",
+                "HTTP_HOST": "testserver",
+                "wsgi.url_scheme": "http",
+                "wsgi.input": io.BytesIO(),
+                **headers,
+            }
+            response = application(environ, start_response)
+            b"".join(response)
+            response.close()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(worker, [requests // concurrency] * concurrency))
+    return requests // concurrency * concurrency / (time.perf_counter() - start)
+
+
+def run_asgi(path, headers, requests, concurrency):
+    from django.core.asgi import get_asgi_application
+
+    application = get_asgi_application()
+    path, _, query_string = path.partition("?")
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "server": ("testserver", "80"),
+        "path": path,
+        "query_string": query_string.encode(),
+        "headers": [(b"host", b"testserver")]
+        + [
+            (key[5:].lower().replace("_", "-").encode(), value.encode())
+            for key, value in headers.items()
+        ],
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def worker(count):
+        for _ in range(count):
+            messages = []
+
+            async def send(message):
+                messages.append(message)
+
+            await application(dict(scope), receive, send)
+            assert messages[0]["status"] == 200
+
+    async def main():
+        await asyncio.gather(
+            *(worker(requests // concurrency) for _ in range(concurrency))
+        )
+
+    start = time.perf_counter()
+    asyncio.run(main())
+    return requests // concurrency * concurrency / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--posts", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--keepdb", action="store_true")
+    args = parser.parse_args()
+
+    setup()
+    from django.test.utils import override_settings
+    from rest_framework_simplejwt.tokens import RefreshToken
+
+    from user.models import User
+
+    with test_database(keepdb=args.keepdb), override_settings(
+        ALLOWED_HOSTS=["testserver"], BLOG_RESPONSE_CACHE_TIMEOUT=0
+    ):
+        seed_blog(users=100, posts=args.posts, tags=200, comments=0)
+        user = User.objects.first()
+        token = RefreshToken.for_user(user).access_token
+        headers = {"HTTP_AUTHORIZATION": f"JWT {token}"}
+
+        for name, runner, path in (
+            ("wsgi", run_wsgi, "/api/post/?pagination=cursor"),
+            ("asgi", run_asgi, "/api/async/post/"),
+        ):
+            rps = runner(path, headers, args.requests, args.concurrency)
+            print(f"{name}: {rps:.1f} requests/sec")
+
+
+if __name__ == "__main__":
+    main()
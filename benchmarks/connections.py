@@ -0,0 +1,129 @@
+"""
+Compare request latency under concurrent load with connections closed after
+every request, kept open, and kept open with health checks.
+
+    python -m benchmarks.connections --requests 2000 --concurrency 16
+
+Requests go through the WSGI handler in a pool of threads, like a threaded
+WSGI server, so connections are opened and closed as in production.
+"""
+import argparse
+import io
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks import seed_blog, setup, summarize, test_database
+
+MODES = (
+    ("closed", {"CONN_MAX_AGE": 0, "CONN_HEALTH_CHECKS": False}),
+    ("persistent", {"CONN_MAX_AGE": 60, "CONN_HEALTH_CHECKS": False}),
+    ("persistent+checks", {"CONN_MAX_AGE": 60, "CONN_HEALTH_CHECKS": True}),
+)
+
+
+def run(application, path, headers, requests, concurrency):
+    """
+    Send requests from concurrency threads, return every duration.
+    """
+    from django.db import connections
+
+    path, _, query_string = path.partition("?")
+
+    def start_response(status, response_headers):
+        assert status.startswith("200"), status
+
+    def worker(count):
+        durations = []
+        try:
+            for _ in range(count):
+                environ = {
+                    "REQUEST_METHOD": "GET",
+                    "PATH_INFO": path,
+                    "QUERY_STRING": query_string,
+                    "SERVER_NAME": "testserver",
+                    "SERVER_PORT": "80",
+                    "HTTP_HOST": "testserver",
+                    "wsgi.url_scheme": "http",
+                    "wsgi.input": io.BytesIO(),
+                    **headers,
+                }
+                start = time.perf_counter()
+                response = application(environ, start_response)
+                b"".join(response)
+                response.close()
+                durations.append(time.perf_counter() - start)
+        finally:
+            # Persistent connections of the thread would block dropping the
+            # test database.
+            connections.close_all()
+        return durations
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = executor.map(worker, [requests // concurrency] * concurrency)
+        return [duration for durations in results for duration in durations]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--posts", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--keepdb", action="store_true")
+    args = parser.parse_args()
+
+    setup()
+    from django.core.wsgi import get_wsgi_application
+    from django.db import connections
+    from django.test.utils import override_settings
+    from rest_framework_simplejwt.tokens import RefreshToken
+
+    from core.metrics import registry
+    from user.models import User
+
+    with test_database(keepdb=args.keepdb), override_settings(
+        ALLOWED_HOSTS=["testserver"], BLOG_RESPONSE_CACHE_TIMEOUT=0
+    ):
+        seed_blog(users=100, posts=args.posts, tags=200, comments=0)
+        user = User.objects.first()
+        token = RefreshToken.for_user(user).access_token
+        headers = {"HTTP_AUTHORIZATION": f"JWT {token}"}
+        application = get_wsgi_application()
+        settings_dict = connections["default"].settings_dict
+        original = {key: settings_dict[key] for key in MODES[0][1]}
+
+        try:
+            for name, options in MODES:
+                # Connections of new threads are created with these settings.
+                settings_dict.update(options)
+                registry.clear()
+                durations = run(
+                    application,
+                    "/api/post/?pagination=cursor",
+                    headers,
+                    args.requests,
+                    args.concurrency,
+                )
+                counters = {
+                    counter: registry.counters.get(
+                        (counter, (("alias", "default"),)), 0
+                    )
+                    for counter in (
+                        "db_connections_opened_total",
+                        "db_connections_reused_total",
+                    )
+                }
+                print(
+                    f"{name:>17}: "
+                    + ", ".join(
+                        f"{key}={value:.2f}ms"
+                        for key, value in summarize(durations).items()
+                    )
+                    + f", opened={counters['db_connections_opened_total']}"
+                    + f", reused={counters['db_connections_reused_total']}"
+                )
+        finally:
+            settings_dict.update(original)
+
+
+if __name__ == "__main__":
+    main()
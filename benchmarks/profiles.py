@@ -0,0 +1,106 @@
+"""
+Compare startup time and per request overhead of settings profiles.
+
+    python -m benchmarks.profiles --requests 2000 --rounds 5
+
+Every profile runs in its own process. Startup covers Django setup, URL
+configuration and loading the middleware. Requests are cached post lists,
+so they measure the framework rather than the database.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+PROFILES = ("core.settings", "core.settings_production")
+
+
+def run_profile(requests):
+    """
+    Measure the profile of DJANGO_SETTINGS_MODULE, print results as JSON.
+    """
+    start = time.perf_counter()
+    import django
+
+    django.setup()
+    from django.core.handlers.wsgi import WSGIHandler
+    from django.urls import get_resolver
+
+    get_resolver().url_patterns
+    WSGIHandler()
+    startup = time.perf_counter() - start
+
+    from django.test import Client
+    from django.test.utils import override_settings
+    from rest_framework_simplejwt.tokens import RefreshToken
+
+    from benchmarks import measure, summarize, test_database
+    from blog.models import Post
+    from user.models import User
+
+    with test_database(), override_settings(ALLOWED_HOSTS=["testserver"]):
+        user = User.objects.create(username="benchmark", email="benchmark@mail.com")
+        for i in range(25):
+            Post.objects.create(title=f"post {i}", description="text", author=user)
+        client = Client(
+            HTTP_AUTHORIZATION=f"JWT {RefreshToken.for_user(user).access_token}"
+        )
+
+        def request():
+            assert client.get("/api/post/")["X-Cache"] == "HIT"
+
+        client.get("/api/post/")
+        durations = measure(request, requests)
+
+    print(json.dumps({"startup": startup * 1000, **summarize(durations)}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument(
+        "--rounds", type=int, default=3, help="Median of this many runs is reported"
+    )
+    parser.add_argument("--profile", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.profile:
+        os.environ["DJANGO_SETTINGS_MODULE"] = args.profile
+        run_profile(args.requests)
+        return
+
+    # Profiles take turns so machine noise affects them alike.
+    results = {profile: [] for profile in PROFILES}
+    for _ in range(args.rounds):
+        for profile in PROFILES:
+            output = subprocess.run(
+                [
+                    sys.executable,
+                    "-m",
+                    "benchmarks.profiles",
+                    "--profile",
+                    profile,
+                    "--requests",
+                    str(args.requests),
+                ],
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout
+            results[profile].append(json.loads(output.splitlines()[-1]))
+
+    for profile, rounds in results.items():
+        print(
+            f"{profile:>24}: "
+            + ", ".join(
+                f"{key}={statistics.median(r[key] for r in rounds):.2f}ms"
+                for key in rounds[0]
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Compare JSON rendering and parsing throughput of DRF's JSON renderer and
+parser with the orjson based ones.
+
+    python -m benchmarks.renderers --page-size 1000 --repeat 100
+
+Pages are serialized posts with descriptions, and raw values() rows whose
+UUIDs and datetimes are left to the encoder.
+"""
+import argparse
+import io
+
+from benchmarks import measure, seed_blog, setup, summarize, test_database
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--page-size", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=100)
+    parser.add_argument("--keepdb", action="store_true")
+    args = parser.parse_args()
+
+    setup()
+    from rest_framework.parsers import JSONParser
+    from rest_framework.renderers import JSONRenderer
+
+    from blog.models import Post
+    from blog.serializers import PostSerializer
+    from core.parsers import ORJSONParser
+    from core.renderers import ORJSONRenderer, orjson
+    from user.models import User
+
+    if orjson is None:
+        parser.exit(1, "orjson is not installed\n")
+
+    with test_database(keepdb=args.keepdb):
+        seed_blog(users=100, posts=args.page_size, tags=200, comments=0)
+        queryset = Post.objects.feed_for(User.objects.first())[: args.page_size]
+        pages = {
+            "serialized": {"results": PostSerializer(queryset, many=True).data},
+            "values": {
+                "results": list(
+                    queryset.prefetch_related(None).values(
+                        "id", "title", "description", "created_at", "updated_at"
+                    )
+                )
+            },
+        }
+
+    for page_name, page in pages.items():
+        body = JSONRenderer().render(page)
+        assert ORJSONRenderer().render(page) == body
+        size = len(body) / 1024 / 1024
+        for name, func in (
+            ("JSONRenderer", lambda: JSONRenderer().render(page)),
+            ("ORJSONRenderer", lambda: ORJSONRenderer().render(page)),
+            ("JSONParser", lambda: JSONParser().parse(io.BytesIO(body))),
+            ("ORJSONParser", lambda: ORJSONParser().parse(io.BytesIO(body))),
+        ):
+            summary = summarize(measure(func, args.repeat))
+            print(
+                f"{page_name:>10} {name:>14}: "
+                f"p50={summary['p50']:.2f}ms, "
+                f"{size / summary['p50'] * 1000:.0f}MB/s"
+            )
+
+
+if __name__ == "__main__":
+    main()
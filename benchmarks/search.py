@@ -0,0 +1,51 @@
+"""
+Compare full-text search with the icontains path over title and description.
+
+    python -m benchmarks.search --posts 1000000 --keepdb
+"""
+import argparse
+import itertools
+
+from benchmarks import measure, seed_blog, setup, summarize, test_database
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--posts", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--keepdb", action="store_true")
+    args = parser.parse_args()
+
+    setup()
+    from django.db.models import Q
+
+    from blog.filters import PostFilter
+    from blog.management.commands.seed_blog import VOCABULARY_SIZE, words
+    from blog.models import Post
+
+    def icontains(term):
+        return Post.objects.filter(
+            Q(title__icontains=term) | Q(description__icontains=term)
+        ).order_by("-created_at")
+
+    def search(term):
+        return PostFilter({"search": term}, queryset=Post.objects.all()).qs
+
+    with test_database(keepdb=args.keepdb):
+        seed_blog(users=100, posts=args.posts, tags=200, comments=0)
+        for name, query in (("icontains", icontains), ("search", search)):
+            terms = itertools.cycle(
+                words(VOCABULARY_SIZE)[:: VOCABULARY_SIZE // args.repeat]
+            )
+            durations = measure(lambda: list(query(next(terms))[:25]), args.repeat)
+            print(
+                f"{name:>10}: "
+                + ", ".join(
+                    f"{key}={value:.2f}ms"
+                    for key, value in summarize(durations).items()
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Compare CPU time of serializing a page of the post feed with
+PostListSerializer and with PostFeedSerializer.
+
+    python -m benchmarks.serializers --posts 10000 --repeat 500
+
+Both load the page with its tags; CPU time of this process is measured, so
+time spent waiting on PostgreSQL is left out.
+"""
+import argparse
+import time
+
+from benchmarks import seed_blog, setup, summarize, test_database
+
+
+def measure_cpu(func, repeat):
+    """
+    Call func repeat times and return the CPU time of every call in seconds.
+    """
+    durations = []
+    for _ in range(repeat):
+        start = time.process_time()
+        func()
+        durations.append(time.process_time() - start)
+    return durations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--posts", type=int, default=10_000)
+    parser.add_argument("--page-size", type=int, default=25)
+    parser.add_argument("--repeat", type=int, default=500)
+    parser.add_argument("--keepdb", action="store_true")
+    args = parser.parse_args()
+
+    setup()
+    from rest_framework.renderers import JSONRenderer
+
+    from blog.models import Post
+    from blog.serializers import PostFeedSerializer, PostListSerializer
+    from user.models import User
+
+    with test_database(keepdb=args.keepdb):
+        seed_blog(users=100, posts=args.posts, tags=200, comments=0)
+        queryset = Post.objects.feed_for(User.objects.first())
+
+        def model_serializer():
+            page = queryset[: args.page_size]
+            return PostListSerializer(page, many=True).data
+
+        def feed_serializer():
+            rows = queryset.prefetch_related(None).values(
+                *PostFeedSerializer.get_values(PostListSerializer.Meta.fields)
+            )
+            return PostFeedSerializer(rows[: args.page_size]).data
+
+        renderer = JSONRenderer()
+        assert renderer.render(model_serializer()) == renderer.render(feed_serializer())
+        for name, func in (
+            ("PostListSerializer", model_serializer),
+            ("PostFeedSerializer", feed_serializer),
+        ):
+            # Warm up caches of querysets, serializer fields and content types.
+            func()
+            summary = summarize(measure_cpu(func, args.repeat))
+            print(
+                f"{name:>18}: "
+                + ", ".join(f"{key}={value:.2f}ms" for key, value in summary.items())
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Compare filtering the feed by tags through the taggit join with the
+tag_names array.
+
+    python -m benchmarks.tags --posts 1000000 --keepdb
+"""
+import argparse
+import itertools
+
+from benchmarks import measure, seed_blog, setup, summarize, test_database
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--posts", type=int, default=100_000)
+    parser.add_argument("--tags", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--keepdb", action="store_true")
+    args = parser.parse_args()
+
+    setup()
+    from taggit.models import Tag
+
+    from blog.models import Post
+
+    def feed(queryset):
+        return queryset.filter(is_active=True).order_by("-created_at", "-id")
+
+    queries = (
+        (
+            "tags__name",
+            lambda names: feed(Post.objects.filter(tags__name__icontains=names[0])),
+        ),
+        ("join any", lambda names: feed(Post.objects.filter(tags__name__in=names))),
+        (
+            "join any distinct",
+            lambda names: feed(Post.objects.filter(tags__name__in=names)).distinct(),
+        ),
+        (
+            "join all",
+            lambda names: feed(
+                Post.objects.filter(tags__name=names[0]).filter(tags__name=names[1])
+            ),
+        ),
+        (
+            "array any",
+            lambda names: feed(Post.objects.filter(tag_names__overlap=names)),
+        ),
+        (
+            "array all",
+            lambda names: feed(Post.objects.filter(tag_names__contains=names)),
+        ),
+    )
+
+    with test_database(keepdb=args.keepdb):
+        seed_blog(users=100, posts=args.posts, tags=args.tags, comments=0)
+        names = list(Tag.objects.values_list("name", flat=True))
+        for name, query in queries:
+            pairs = itertools.cycle(zip(names[::2], names[1::2]))
+            durations = measure(
+                lambda: list(query(list(next(pairs)))[:25]), args.repeat
+            )
+            print(
+                f"{name:>17}: "
+                + ", ".join(
+                    f"{key}={value:.2f}ms"
+                    for key, value in summarize(durations).items()
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()
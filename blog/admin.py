@@ -1,14 +1,15 @@
 from django.contrib import admin
+from django.db import transaction
 from django.db.models import Count
 
-from .models import Comment, Post
+from .models import Comment, OutboxEmail, Post
 
 
 @admin.register(Post)
 class PostAdmin(admin.ModelAdmin):
     list_per_page = 25
     prepopulated_fields = {"slug": ["title"]}
-    list_display = ["title", "is_active", "author", "tag_list", "count_comments"]
+    list_display = ["title", "is_active", "author", "tag_list", "comments_count"]
     list_editable = [
         "is_active",
     ]
@@ -16,22 +17,59 @@ class PostAdmin(admin.ModelAdmin):
     search_fields = ["title", "author__username"]
 
     def get_queryset(self, request):
-        return (
-            super()
-            .get_queryset(request)
-            .prefetch_related("tags", "comments")
-            .annotate(count_comments=Count("comments"))
-        )
+        return super().get_queryset(request).with_tags()
 
     def tag_list(self, obj):
         return ", ".join(o.name for o in obj.tags.all())
 
-    @admin.display(ordering="-count_comments", description="Comments")
-    def count_comments(self, post):
-        return post.comments.count()
+    @admin.display(ordering="-comments_count", description="Comments")
+    def comments_count(self, post):
+        return post.comments_count
 
 
 @admin.register(Comment)
 class CommentAdmin(admin.ModelAdmin):
-    list_display = ["text", "user", "post"]
+    list_display = ["text", "user", "post", "is_hidden"]
+    list_filter = ["is_hidden"]
     search_fields = ["post__title", "user__username", "text"]
+
+    @transaction.atomic
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        # Only visible comments are counted.
+        was_visible = change and not form.initial.get("is_hidden")
+        is_visible = not obj.is_hidden
+        if change and "post" in form.changed_data:
+            # Moved to another post, uncount it on the original one.
+            Post.objects.filter(pk=form.initial["post"]).comments_changed(
+                -int(was_visible)
+            )
+            Post.objects.filter(pk=obj.post_id).comments_changed(int(is_visible))
+        else:
+            delta = int(is_visible) - int(was_visible)
+            Post.objects.filter(pk=obj.post_id).comments_changed(delta)
+
+    @transaction.atomic
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        delta = 0 if obj.is_hidden else -1
+        Post.objects.filter(pk=obj.post_id).comments_changed(delta)
+
+    @transaction.atomic
+    def delete_queryset(self, request, queryset):
+        counts = list(
+            queryset.filter(is_hidden=False)
+            .order_by()
+            .values("post")
+            .annotate(count=Count("pk"))
+        )
+        super().delete_queryset(request, queryset)
+        for row in counts:
+            Post.objects.filter(pk=row["post"]).comments_changed(-row["count"])
+
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = ["subject", "recipient", "attempts", "created_at", "sent_at"]
+    list_filter = ["sent_at"]
+    search_fields = ["subject", "recipient"]
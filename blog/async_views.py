@@ -0,0 +1,131 @@
+"""
+ASGI-native read-only views for posts and comments.
+
+They share querysets, filters, pagination and serializers with the DRF
+viewsets. Database work is grouped into as few sync_to_async hops as possible
+and serialization of the loaded objects runs on the event loop.
+"""
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from rest_framework import exceptions
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+
+from .filters import PostFilter
+from .models import Comment, Post
+from .pagination import (
+    CommentCursorPagination,
+    PostCursorPagination,
+    PostSearchCursorPagination,
+)
+from .serializers import CommentSerializer, PostListSerializer, PostSerializer
+
+
+def _json(data, status=200):
+    return JsonResponse(data, status=status, encoder=JSONEncoder, safe=False)
+
+
+def _authenticate(request):
+    """
+    Return the user authenticated by the configured DRF authentication classes.
+    """
+    for authentication_class in api_settings.DEFAULT_AUTHENTICATION_CLASSES:
+        user_auth = authentication_class().authenticate(request)
+        if user_auth is not None:
+            return user_auth[0]
+    raise exceptions.NotAuthenticated()
+
+
+def _load_posts(request):
+    user = _authenticate(request)
+    filterset = PostFilter(request.GET, queryset=Post.objects.feed_for(user))
+    if not filterset.is_valid():
+        raise exceptions.ValidationError(filterset.errors)
+    queryset = filterset.qs
+    # Search results are ranked, like PostViewSet.paginator.
+    if request.GET.get("search"):
+        paginator = PostSearchCursorPagination()
+    else:
+        paginator = PostCursorPagination()
+    page = paginator.paginate_queryset(queryset, Request(request))
+    return paginator, page
+
+
+def _load_post(request, pk):
+    user = _authenticate(request)
+    return Post.objects.feed_for(user).get(pk=pk)
+
+
+def _load_comments(request, post_pk):
+    user = _authenticate(request)
+    queryset = (
+        Comment.objects.visible_to(user).select_related("user").filter(post_id=post_pk)
+    )
+    paginator = CommentCursorPagination()
+    page = paginator.paginate_queryset(queryset, Request(request))
+    return paginator, page
+
+
+def _load_comment(request, post_pk, pk):
+    user = _authenticate(request)
+    return (
+        Comment.objects.visible_to(user)
+        .select_related("user")
+        .get(post_id=post_pk, pk=pk)
+    )
+
+
+def _handle_errors(view):
+    """
+    Turn API exceptions into JSON error responses like DRF views do.
+    """
+
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        try:
+            return await view(request, *args, **kwargs)
+        except exceptions.APIException as exc:
+            if isinstance(exc.detail, (list, dict)):
+                data = exc.detail
+            else:
+                data = {"detail": exc.detail}
+            return _json(data, status=exc.status_code)
+        except (Post.DoesNotExist, Comment.DoesNotExist):
+            return _json({"detail": "Not found."}, status=404)
+
+    return wrapper
+
+
+@_handle_errors
+async def post_list(request):
+    """
+    Cursor paginated posts, newest first.
+    """
+    paginator, page = await sync_to_async(_load_posts)(request)
+    data = PostListSerializer(page, many=True).data
+    return _json(paginator.get_paginated_response(data).data)
+
+
+@_handle_errors
+async def post_detail(request, pk):
+    post = await sync_to_async(_load_post)(request, pk)
+    return _json(PostSerializer(post).data)
+
+
+@_handle_errors
+async def comment_list(request, post_pk):
+    """
+    Cursor paginated comments of a post, oldest first.
+    """
+    paginator, page = await sync_to_async(_load_comments)(request, post_pk)
+    data = CommentSerializer(page, many=True).data
+    return _json(paginator.get_paginated_response(data).data)
+
+
+@_handle_errors
+async def comment_detail(request, post_pk, pk):
+    comment = await sync_to_async(_load_comment)(request, post_pk, pk)
+    return _json(CommentSerializer(comment).data)
@@ -0,0 +1,216 @@
+import json
+from collections import Counter, defaultdict
+from itertools import islice
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection, transaction
+from django.db.models import prefetch_related_objects
+from rest_framework.utils.encoders import JSONEncoder
+from taggit.models import Tag
+
+from .cache import bump_version
+from .models import Comment, OutboxEmail, Post, TagCount, UUIDTaggedItem
+from .serializers import CommentSerializer, PostSerializer
+
+CHUNK_SIZE = 500
+# Status of moderated comments by operation.
+MODERATION_STATUSES = {"delete": "deleted", "hide": "hidden", "unhide": "unhidden"}
+
+
+def chunked(iterable, size):
+    """
+    Yield lists of up to size items from iterable.
+    """
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def import_posts(lines, author, chunk_size=CHUNK_SIZE):
+    """
+    Validate and create posts of author from (line number, row) pairs, chunk
+    by chunk. Returns number of created posts and errors of invalid rows by
+    line number.
+    """
+    created, errors = 0, []
+    for chunk in chunked(lines, chunk_size):
+        valid = []
+        for line, row in chunk:
+            serializer = PostSerializer(data=row)
+            if serializer.is_valid():
+                valid.append(serializer.validated_data)
+            else:
+                errors.append({"line": line, "errors": serializer.errors})
+        if valid:
+            with transaction.atomic():
+                _create_posts(valid, author)
+            created += len(valid)
+
+    if created:
+        OutboxEmail.objects.create(
+            subject=f"Posts imported: {created}",
+            message="Posts imported",
+            from_email="sulav@admin.com",
+            recipient=author.email,
+        )
+        # bulk_create does not send signals.
+        transaction.on_commit(bump_version)
+    return created, errors
+
+
+def export_posts(queryset, chunk_size=CHUNK_SIZE):
+    """
+    Yield posts of queryset as JSON Lines.
+    Posts and their tags are loaded chunk by chunk so memory stays flat.
+    """
+    posts = queryset.prefetch_related(None).iterator(chunk_size=chunk_size)
+    for chunk in chunked(posts, chunk_size):
+        prefetch_related_objects(chunk, "tags")
+        for data in PostSerializer(chunk, many=True).data:
+            yield json.dumps(data, cls=JSONEncoder) + "\n"
+
+
+def create_comments(rows, post_id, user):
+    """
+    Validate rows and create the valid ones as comments of user on the post
+    with a single insert. Returns the result of every row in order, the
+    created comment or the errors of the row.
+    Raises Post.DoesNotExist if there is no such post.
+    """
+    if not Post.objects.filter(pk=post_id).exists():
+        raise Post.DoesNotExist
+    comments, results = [], []
+    for index, row in enumerate(rows):
+        serializer = CommentSerializer(data=row)
+        if serializer.is_valid():
+            comment = Comment(user=user, post_id=post_id, **serializer.validated_data)
+            comments.append(comment)
+            results.append({"index": index, "status": "created", "comment": comment})
+        else:
+            results.append(
+                {"index": index, "status": "invalid", "errors": serializer.errors}
+            )
+
+    if comments:
+        with transaction.atomic():
+            # The post may have been deleted since.
+            if not Post.objects.filter(pk=post_id).comments_changed(len(comments)):
+                raise Post.DoesNotExist
+            Comment.objects.bulk_create(comments)
+        # bulk_create does not send signals.
+        transaction.on_commit(bump_version)
+    for result in results:
+        if "comment" in result:
+            result["comment"] = CommentSerializer(result["comment"]).data
+    return results
+
+
+def moderate_comments(ids, operation):
+    """
+    Delete, hide or unhide the comments of ids in one transaction, keeping
+    comments counts of their posts. Returns the status of every id in order:
+    deleted, hidden, unhidden, unchanged or not_found.
+    """
+    ids = list(dict.fromkeys(ids))
+    with transaction.atomic():
+        comments = {
+            pk: (post_id, is_hidden)
+            for pk, post_id, is_hidden in Comment.objects.filter(pk__in=ids)
+            .select_for_update()
+            .values_list("pk", "post_id", "is_hidden")
+        }
+        if operation == "delete":
+            changed = list(comments)
+        else:
+            hidden = operation == "hide"
+            changed = [
+                pk for pk, (_, is_hidden) in comments.items() if is_hidden != hidden
+            ]
+
+        if changed:
+            if operation == "delete":
+                # A single DELETE without collecting, comments have no
+                # dependent rows. No delete signals are sent.
+                table = connection.ops.quote_name(Comment._meta.db_table)
+                column = connection.ops.quote_name(Comment._meta.pk.column)
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        f"DELETE FROM {table} WHERE {column} = ANY(%s)", [changed]
+                    )
+            else:
+                Comment.objects.filter(pk__in=changed).update(is_hidden=hidden)
+
+            # Only visible comments are counted, posts of hidden comments are
+            # still marked as changed for staff users.
+            deltas = Counter({comments[pk][0]: 0 for pk in changed})
+            for pk in changed:
+                post_id, is_hidden = comments[pk]
+                if operation == "unhide":
+                    deltas[post_id] += 1
+                elif not is_hidden:
+                    deltas[post_id] -= 1
+            posts = defaultdict(list)
+            for post_id, delta in deltas.items():
+                posts[delta].append(post_id)
+            for delta, post_ids in posts.items():
+                Post.objects.filter(pk__in=post_ids).comments_changed(delta)
+
+    if changed:
+        # Bulk updates and deletes do not send signals.
+        transaction.on_commit(bump_version)
+    changed = set(changed)
+    results = []
+    for pk in ids:
+        if pk in changed:
+            status = MODERATION_STATUSES[operation]
+        elif pk in comments:
+            status = "unchanged"
+        else:
+            status = "not_found"
+        results.append({"id": pk, "status": status})
+    return results
+
+
+def _create_posts(validated, author):
+    posts = []
+    slugs = Post.objects.free_slugs(author.id, [data["title"] for data in validated])
+    for data, slug in zip(validated, slugs):
+        data = dict(data)
+        tag_names = sorted(set(data.pop("tags", [])))
+        posts.append(
+            Post(
+                author=author,
+                slug=slug,
+                tag_names=tag_names,
+                **data,
+            )
+        )
+    Post.objects.bulk_create(posts)
+
+    tags = _get_or_create_tags(
+        {name for data in validated for name in data.get("tags", [])}
+    )
+    content_type = ContentType.objects.get_for_model(Post)
+    UUIDTaggedItem.objects.bulk_create(
+        UUIDTaggedItem(content_type=content_type, object_id=post.id, tag=tags[name])
+        for post, data in zip(posts, validated)
+        for name in set(data.get("tags", []))
+    )
+    TagCount.objects.refresh([tag.id for tag in tags.values()])
+
+
+def _get_or_create_tags(names):
+    """
+    Return tags by name, creating the missing ones.
+    """
+    tags = {tag.name: tag for tag in Tag.objects.filter(name__in=names)}
+    missing = names - tags.keys()
+    new_tags = [Tag(name=name) for name in missing]
+    for tag in new_tags:
+        tag.slug = tag.slugify(tag.name)
+    Tag.objects.bulk_create(new_tags, ignore_conflicts=True)
+    tags.update({tag.name: tag for tag in Tag.objects.filter(name__in=missing)})
+    # Names whose slug collides with another tag, let taggit pick a free slug.
+    for name in names - tags.keys():
+        tags[name] = Tag.objects.create(name=name)
+    return tags
@@ -0,0 +1,106 @@
+import time
+from functools import wraps
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date
+from rest_framework.response import Response
+
+VALIDATOR_HEADERS = ("ETag", "Last-Modified")
+VERSION_KEY = "blog:response:version"
+HITS_KEY = "blog:response:hits"
+MISSES_KEY = "blog:response:misses"
+
+
+def get_version():
+    """
+    Return current version of post data. Cached responses of older versions
+    are never read again.
+    """
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # Start from the clock so a lost version never reuses an old one.
+        cache.add(VERSION_KEY, time.time_ns(), None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def bump_version():
+    """
+    Invalidate every cached post response.
+    """
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        get_version()
+
+
+def get_stats():
+    """
+    Return hit and miss counters of the response cache.
+    """
+    return {
+        "hits": cache.get(HITS_KEY, 0),
+        "misses": cache.get(MISSES_KEY, 0),
+    }
+
+
+def _incr(key):
+    if not cache.add(key, 1, None):
+        cache.incr(key)
+
+
+def _get_cache_key(request):
+    query = urlencode(sorted(request.query_params.items()))
+    return f"blog:response:{get_version()}:{request.path}?{query}"
+
+
+def cache_response(method):
+    """
+    Cache successful responses of a viewset method for non-staff users,
+    which all see the same active posts. ETag and Last-Modified headers are
+    cached with the data, so conditional requests are answered from the cache.
+    """
+
+    @wraps(method)
+    def wrapper(view, request, *args, **kwargs):
+        if request.user.is_staff:
+            return method(view, request, *args, **kwargs)
+
+        key = _get_cache_key(request)
+        cached = cache.get(key)
+        if cached is not None:
+            _incr(HITS_KEY)
+            response = _get_cached_response(request, **cached)
+            response["X-Cache"] = "HIT"
+            return response
+
+        _incr(MISSES_KEY)
+        response = method(view, request, *args, **kwargs)
+        if response.status_code == 200:
+            headers = {h: response[h] for h in VALIDATOR_HEADERS if h in response}
+            cache.set(
+                key,
+                {"data": response.data, "headers": headers},
+                settings.BLOG_RESPONSE_CACHE_TIMEOUT,
+            )
+        response["X-Cache"] = "MISS"
+        return response
+
+    return wrapper
+
+
+def _get_cached_response(request, data, headers):
+    last_modified = headers.get("Last-Modified")
+    response = get_conditional_response(
+        request,
+        etag=headers.get("ETag"),
+        last_modified=parse_http_date(last_modified) if last_modified else None,
+    )
+    if response is None:
+        response = Response(data)
+    for header, value in headers.items():
+        response[header] = value
+    return response
@@ -0,0 +1,72 @@
+import hashlib
+from functools import wraps
+
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+
+
+def get_etag(*parts):
+    """
+    Return a quoted ETag for the given version parts.
+    """
+    return quote_etag(hashlib.md5(repr(parts).encode()).hexdigest())
+
+
+def conditional(version_method):
+    """
+    Answer conditional GET requests of a viewset method with 304 Not Modified.
+
+    version_method(view, request, *args, **kwargs) returns an (etag,
+    last_modified) pair computed with cheap queries, or None to skip the check.
+    The wrapped method only runs when the client does not have that version.
+    """
+
+    def decorator(method):
+        @wraps(method)
+        def wrapper(view, request, *args, **kwargs):
+            version = version_method(view, request, *args, **kwargs)
+            if version is None:
+                return method(view, request, *args, **kwargs)
+
+            etag, last_modified = version
+            timestamp = int(last_modified.timestamp()) if last_modified else None
+            response = get_conditional_response(
+                request, etag=etag, last_modified=timestamp
+            )
+            if response is None:
+                response = method(view, request, *args, **kwargs)
+            if response.status_code in (200, 304):
+                response["ETag"] = etag
+                if timestamp is not None:
+                    response["Last-Modified"] = http_date(timestamp)
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def conditional_on_data(method):
+    """
+    Answer conditional GET requests of a viewset method with 304 Not Modified,
+    with an ETag of the response data.
+
+    For responses without a cheap version query, such as lists whose rows
+    can change without a signal. The wrapped method always runs, the 304
+    only saves sending the body.
+    """
+
+    @wraps(method)
+    def wrapper(view, request, *args, **kwargs):
+        response = method(view, request, *args, **kwargs)
+        if response.status_code != 200:
+            return response
+
+        etag = get_etag(request.get_full_path(), response.data)
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            response = not_modified
+        response["ETag"] = etag
+        return response
+
+    return wrapper
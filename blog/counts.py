@@ -0,0 +1,54 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+from .cache import get_version
+
+
+def get_count(queryset):
+    """
+    Return a (count, is_exact) pair for the queryset.
+
+    Querysets the planner expects to be smaller than BLOG_COUNT_EXACT_THRESHOLD
+    are counted with COUNT(*), bigger ones use the planner estimate.
+    Both are cached for BLOG_COUNT_CACHE_TIMEOUT seconds, keyed by the
+    response cache version and the SQL of the queryset so that every filter
+    combination gets its own entry and writes invalidate them.
+    """
+    queryset = queryset.order_by()
+    key = _get_cache_key(queryset)
+    cached = cache.get(key)
+    if cached is not None:
+        return tuple(cached)
+
+    estimate = estimate_count(queryset)
+    if estimate is None or estimate < settings.BLOG_COUNT_EXACT_THRESHOLD:
+        count = queryset.count(), True
+    else:
+        count = estimate, False
+    cache.set(key, count, settings.BLOG_COUNT_CACHE_TIMEOUT)
+    return count
+
+
+def estimate_count(queryset):
+    """
+    Return the number of rows PostgreSQL planner expects the queryset to return.
+    None if the database can not estimate it.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+
+    sql, params = queryset.query.get_compiler(queryset.db).as_sql()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def _get_cache_key(queryset):
+    sql, params = queryset.query.get_compiler(queryset.db).as_sql()
+    digest = hashlib.md5(f"{sql}{params}".encode()).hexdigest()
+    return f"blog:count:{get_version()}:{queryset.db}:{digest}"
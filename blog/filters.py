@@ -1,12 +1,19 @@
 import django_filters
 from django import forms
+from django.contrib.postgres.search import SearchQuery, SearchRank
 from django.db import models
+from django.db.models import F, FloatField
+from django.db.models.functions import Cast
 from django_filters.rest_framework import FilterSet
 
-from .models import Post
+from .models import Post, TagCount
 
 
 class PostFilter(FilterSet):
+    search = django_filters.CharFilter(method="filter_search")
+    tags = django_filters.CharFilter(method="filter_tags")
+    tags__all = django_filters.CharFilter(method="filter_tags")
+
     class Meta:
         model = Post
         fields = ["is_active", "tags__name"]
@@ -18,3 +25,35 @@ class PostFilter(FilterSet):
                 },
             },
         }
+
+    def filter_search(self, queryset, name, value):
+        """
+        Full-text search over title and description, best matches first.
+        """
+        query = SearchQuery(value, config="english", search_type="websearch")
+        # Rank is cast to double precision so cursors round-trip it exactly.
+        rank = Cast(SearchRank(F("search_vector"), query), FloatField())
+        return (
+            queryset.filter(search_vector=query)
+            .annotate(rank=rank)
+            .order_by("-rank", "-created_at", "-id")
+        )
+
+    def filter_tags(self, queryset, name, value):
+        """
+        Posts with any (tags) or all (tags__all) of the comma separated tags.
+        """
+        names = [tag.strip() for tag in value.split(",") if tag.strip()]
+        if not names:
+            return queryset
+        if name == "tags__all":
+            return queryset.filter(tag_names__contains=names)
+        return queryset.filter(tag_names__overlap=names)
+
+
+class TagCountFilter(FilterSet):
+    search = django_filters.CharFilter(field_name="name", lookup_expr="istartswith")
+
+    class Meta:
+        model = TagCount
+        fields = ["search"]
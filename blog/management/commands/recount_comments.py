@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from blog.cache import bump_version
+from blog.models import Comment, Post
+
+
+class Command(BaseCommand):
+    help = "Recompute comments_count of every post from its visible comments."
+
+    def handle(self, *args, **options):
+        counts = (
+            Comment.objects.filter(post=OuterRef("pk"), is_hidden=False)
+            .order_by()
+            .values("post")
+            .annotate(count=Count("pk"))
+            .values("count")
+        )
+        updated = Post.objects.update(comments_count=Coalesce(Subquery(counts), 0))
+        bump_version()
+        self.stdout.write(self.style.SUCCESS(f"Recounted comments of {updated} posts"))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from blog.cache import bump_version
+from blog.models import TagCount
+
+
+class Command(BaseCommand):
+    help = "Recount active posts of every tag."
+
+    def handle(self, *args, **options):
+        TagCount.objects.refresh()
+        bump_version()
+        self.stdout.write(self.style.SUCCESS("Refreshed tag counts"))
@@ -0,0 +1,314 @@
+import csv
+import hashlib
+import io
+import random
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from uuid import UUID
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, connection, connections, transaction
+from django.template.defaultfilters import slugify
+from django.utils import timezone
+from taggit.models import Tag
+
+from blog.cache import bump_version
+from blog.models import Comment, Post, TagCount, UUIDTaggedItem
+from user.models import User
+
+VOCABULARY_SIZE = 5000
+# Posts and comments are spread over this period before the seeding time.
+PERIOD = timedelta(days=365)
+
+
+def words(count, seed=0):
+    """
+    Return a deterministic vocabulary of pronounceable words.
+    """
+    rng = random.Random(seed)
+    consonants, vowels = "bcdfghjklmnprstvz", "aeiou"
+    vocabulary = set()
+    while len(vocabulary) < count:
+        vocabulary.add(
+            "".join(
+                rng.choice(consonants) + rng.choice(vowels)
+                for _ in range(rng.randint(2, 4))
+            )
+        )
+    return sorted(vocabulary)
+
+
+def get_id(seed, kind, index):
+    """
+    Return the UUID of the index-th row of kind, so rows of other batches
+    can be referenced without querying them.
+    """
+    digest = hashlib.md5(f"{seed}:{kind}:{index}".encode()).digest()
+    return UUID(bytes=digest, version=4)
+
+
+def to_array(values):
+    """
+    Return the PostgreSQL array literal of a list of strings.
+    """
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"') for value in values)
+    return "{" + ",".join(f'"{value}"' for value in escaped) + "}"
+
+
+def insert(model, fields, rows, use_copy):
+    """
+    Insert rows of values of fields, with COPY if use_copy.
+    """
+    if not use_copy:
+        model.objects.bulk_create(model(**dict(zip(fields, row))) for row in rows)
+        return
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(
+        [to_array(value) if isinstance(value, list) else value for value in row]
+        for row in rows
+    )
+    buffer.seek(0)
+    columns = ", ".join(
+        connection.ops.quote_name(model._meta.get_field(field).column)
+        for field in fields
+    )
+    with connection.cursor() as cursor:
+        cursor.copy_expert(
+            f"COPY {connection.ops.quote_name(model._meta.db_table)} ({columns}) "
+            "FROM STDIN WITH (FORMAT csv)",
+            buffer,
+        )
+
+
+def seed_posts(
+    seed,
+    use_copy,
+    start,
+    stop,
+    comments_counts,
+    user_ids,
+    tags,
+    content_type_id,
+    now,
+):
+    """
+    Insert posts start to stop with their tags, tags are (id, name) pairs.
+    """
+    rng = random.Random(f"{seed}:posts:{start}")
+    vocabulary = words(VOCABULARY_SIZE)
+    posts, tagged_items = [], []
+    for index, comments_count in zip(range(start, stop), comments_counts):
+        post_id = get_id(seed, "post", index)
+        title = " ".join(rng.choices(vocabulary, k=6))
+        created_at = now - PERIOD * rng.random()
+        post_tags = rng.sample(tags, rng.randint(0, min(3, len(tags))))
+        posts.append(
+            (
+                post_id,
+                title,
+                " ".join(rng.choices(vocabulary, k=80)),
+                # Post.save is skipped, so the slug is computed here.
+                slugify(title)[:50],
+                rng.random() < 0.9,
+                rng.choice(user_ids),
+                comments_count,
+                sorted(name for _, name in post_tags),
+                created_at,
+                created_at,
+            )
+        )
+        for tag_id, _ in post_tags:
+            tagged_items.append((post_id, content_type_id, tag_id))
+
+    with transaction.atomic():
+        insert(
+            Post,
+            (
+                "id",
+                "title",
+                "description",
+                "slug",
+                "is_active",
+                "author_id",
+                "comments_count",
+                "tag_names",
+                "created_at",
+                "updated_at",
+            ),
+            posts,
+            use_copy,
+        )
+        insert(
+            UUIDTaggedItem,
+            ("object_id", "content_type_id", "tag_id"),
+            tagged_items,
+            use_copy,
+        )
+    return stop - start
+
+
+def seed_comments(seed, use_copy, start, stop, post_indexes, user_ids, now):
+    """
+    Insert comments start to stop on the posts of post_indexes.
+    """
+    rng = random.Random(f"{seed}:comments:{start}")
+    vocabulary = words(VOCABULARY_SIZE)
+    comments = [
+        (
+            get_id(seed, "comment", index),
+            " ".join(rng.choices(vocabulary, k=20)),
+            rng.choice(user_ids),
+            get_id(seed, "post", post_index),
+            now - PERIOD * rng.random(),
+            False,
+        )
+        for index, post_index in zip(range(start, stop), post_indexes)
+    ]
+    with transaction.atomic():
+        insert(
+            Comment,
+            ("id", "text", "user_id", "post_id", "created_at", "is_hidden"),
+            comments,
+            use_copy,
+        )
+    return stop - start
+
+
+def init_worker():
+    """
+    Set up Django in worker processes started without fork and drop
+    connections inherited from the parent.
+    """
+    django.setup()
+    connections.close_all()
+
+
+class Command(BaseCommand):
+    help = "Fill the database with generated users, tagged posts and comments."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=100)
+        parser.add_argument("--posts", type=int, default=10_000)
+        parser.add_argument("--tags", type=int, default=200)
+        parser.add_argument("--comments", type=int, default=50_000)
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=10_000,
+            help="Number of rows inserted per transaction.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Number of processes inserting batches concurrently.",
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=0,
+            help="Same seed generates the same data, users are named "
+            "seed<seed>_<number>.",
+        )
+        parser.add_argument(
+            "--no-copy",
+            action="store_false",
+            dest="use_copy",
+            help="Insert with bulk_create even on PostgreSQL.",
+        )
+
+    def handle(self, *args, **options):
+        options["use_copy"] &= connection.vendor == "postgresql"
+        if options["users"] < 1 or (options["comments"] and options["posts"] < 1):
+            raise CommandError("Posts need users and comments need posts.")
+        now = timezone.now()
+
+        user_ids = self.seed_users(options)
+        tags = self.seed_tags(options)
+        content_type_id = ContentType.objects.get_for_model(Post).id
+        batch_size = options["batch_size"]
+        seed, use_copy = options["seed"], options["use_copy"]
+        posts, comments = options["posts"], options["comments"]
+
+        # Posts of comments are picked upfront, so posts are inserted with
+        # their final comments_count.
+        rng = random.Random(f"{seed}:comment-posts")
+        post_indexes = [rng.randrange(posts) for _ in range(comments)]
+        comments_counts = [0] * posts
+        for post_index in post_indexes:
+            comments_counts[post_index] += 1
+
+        post_batches = [
+            (seed, use_copy, start, min(start + batch_size, posts))
+            + (comments_counts[start : start + batch_size], user_ids, tags)
+            + (content_type_id, now)
+            for start in range(0, posts, batch_size)
+        ]
+        comment_batches = [
+            (seed, use_copy, start, min(start + batch_size, comments))
+            + (post_indexes[start : start + batch_size], user_ids, now)
+            for start in range(0, comments, batch_size)
+        ]
+
+        # Comments reference posts, so every post is committed first.
+        self.run(seed_posts, post_batches, options["workers"], "posts")
+        self.run(seed_comments, comment_batches, options["workers"], "comments")
+
+        TagCount.objects.refresh()
+        bump_version()
+        with connection.cursor() as cursor:
+            for model in (User, Tag, TagCount, Post, UUIDTaggedItem, Comment):
+                cursor.execute(
+                    f"ANALYZE {connection.ops.quote_name(model._meta.db_table)}"
+                )
+        self.stdout.write(self.style.SUCCESS("Seeded the database"))
+
+    def run(self, func, batches, workers, name):
+        """
+        Call func with every batch of arguments, in worker processes if
+        there are more than one.
+        """
+        if workers == 1 or not batches:
+            results = (func(*batch) for batch in batches)
+            self.report(results, name)
+            return
+        # Children must not share the parent's database connection.
+        connections.close_all()
+        with ProcessPoolExecutor(workers, initializer=init_worker) as executor:
+            self.report(executor.map(func, *zip(*batches)), name)
+
+    def report(self, results, name):
+        done = 0
+        for count in results:
+            done += count
+            self.stdout.write(f"Inserted {done} {name}")
+
+    def seed_users(self, options):
+        prefix = f"seed{options['seed']}_"
+        # Seeded users can not log in.
+        password = make_password(None)
+        try:
+            users = User.objects.bulk_create(
+                User(
+                    username=f"{prefix}{index}",
+                    email=f"{prefix}{index}@mail.com",
+                    password=password,
+                )
+                for index in range(options["users"])
+            )
+        except IntegrityError:
+            raise CommandError(
+                f"Data of seed {options['seed']} exists, use another --seed."
+            )
+        return [user.id for user in users]
+
+    def seed_tags(self, options):
+        names = words(options["tags"], seed=f"{options['seed']}:tags")
+        Tag.objects.bulk_create(
+            (Tag(name=name, slug=name) for name in names), ignore_conflicts=True
+        )
+        tags = Tag.objects.filter(name__in=names).order_by("name")
+        return list(tags.values_list("id", "name"))
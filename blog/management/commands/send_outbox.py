@@ -0,0 +1,115 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.mail import EmailMessage, get_connection
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from blog.models import OutboxEmail
+
+
+def send_batch(messages):
+    """
+    Send messages over a single connection.
+    Returns a list with None for every sent message, else the error.
+    """
+    errors = []
+    try:
+        with get_connection() as connection:
+            for message in messages:
+                message.connection = connection
+                try:
+                    message.send()
+                except Exception as exc:
+                    errors.append(repr(exc))
+                else:
+                    errors.append(None)
+    except Exception as exc:
+        # Connection could not be opened or closed, messages sent so far are
+        # retried, which is fine for at least once delivery.
+        errors = [repr(exc)] * len(messages)
+    return errors
+
+
+class Command(BaseCommand):
+    help = "Send pending emails from the outbox."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=100,
+            help="Number of emails sent over one connection.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=4,
+            help="Number of connections sending emails concurrently.",
+        )
+        parser.add_argument(
+            "--max-attempts",
+            type=int,
+            default=5,
+            help="Stop retrying an email after this many failed attempts.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        workers = options["workers"]
+        started_at = timezone.now()
+        sent = failed = 0
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            while True:
+                with transaction.atomic():
+                    # Every email is tried at most once per run, failed ones
+                    # are retried by the next run.
+                    emails = list(
+                        OutboxEmail.objects.select_for_update(skip_locked=True)
+                        .filter(
+                            Q(attempted_at__isnull=True)
+                            | Q(attempted_at__lt=started_at),
+                            sent_at__isnull=True,
+                            attempts__lt=options["max_attempts"],
+                        )
+                        .order_by("created_at")[: batch_size * workers]
+                    )
+                    if not emails:
+                        break
+
+                    batches = [
+                        emails[i : i + batch_size]
+                        for i in range(0, len(emails), batch_size)
+                    ]
+                    results = executor.map(
+                        send_batch,
+                        [[self._build_message(email) for email in b] for b in batches],
+                    )
+
+                    now = timezone.now()
+                    for batch, errors in zip(batches, results):
+                        for email, error in zip(batch, errors):
+                            email.attempts += 1
+                            email.attempted_at = now
+                            if error is None:
+                                email.sent_at = now
+                                email.last_error = ""
+                                sent += 1
+                            else:
+                                email.last_error = error
+                                failed += 1
+                    OutboxEmail.objects.bulk_update(
+                        emails, ["attempts", "attempted_at", "sent_at", "last_error"]
+                    )
+
+        self.stdout.write(self.style.SUCCESS(f"Sent {sent} emails, {failed} failed"))
+
+    def _build_message(self, email):
+        return EmailMessage(
+            subject=email.subject,
+            body=email.message,
+            from_email=email.from_email,
+            to=[email.recipient],
+        )
@@ -0,0 +1,51 @@
+# Generated by Django 4.0.5 on 2026-10-18 11:24
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+CREATE_TRIGGER = """
+CREATE FUNCTION blog_post_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(NEW.description, '')), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER blog_post_search_vector_update
+BEFORE INSERT OR UPDATE OF title, description ON blog_post
+FOR EACH ROW EXECUTE FUNCTION blog_post_search_vector_update();
+
+UPDATE blog_post SET title = title;
+"""
+
+DROP_TRIGGER = """
+DROP TRIGGER blog_post_search_vector_update ON blog_post;
+DROP FUNCTION blog_post_search_vector_update();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0008_outboxemail"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="post",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["search_vector"], name="blog_post_search_idx"
+            ),
+        ),
+        migrations.RunSQL(CREATE_TRIGGER, DROP_TRIGGER),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.0.5 on 2026-10-18 11:25
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Build indexes without blocking writes on big tables.
+    atomic = False
+
+    dependencies = [
+        ("blog", "0009_post_search_vector"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="post",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["-created_at", "-id"],
+                name="blog_post_active_feed_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="post",
+            index=models.Index(
+                fields=["-created_at", "-id"], name="blog_post_feed_idx"
+            ),
+        ),
+    ]
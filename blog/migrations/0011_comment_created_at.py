@@ -0,0 +1,31 @@
+# Generated by Django 4.0.5 on 2026-10-18 11:40
+
+import django.utils.timezone
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("blog", "0010_post_feed_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="comment",
+            name="created_at",
+            field=models.DateTimeField(
+                auto_now_add=True, default=django.utils.timezone.now
+            ),
+            preserve_default=False,
+        ),
+        AddIndexConcurrently(
+            model_name="comment",
+            index=models.Index(
+                fields=["post", "created_at", "id"],
+                name="blog_comment_post_created_idx",
+            ),
+        ),
+    ]
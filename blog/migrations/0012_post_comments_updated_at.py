@@ -0,0 +1,18 @@
+# Generated by Django 4.0.5 on 2026-10-18 11:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0011_comment_created_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="comments_updated_at",
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.0.5 on 2026-10-18 11:54
+
+import django.contrib.postgres.fields
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def copy_tag_names(apps, schema_editor):
+    Post = apps.get_model("blog", "Post")
+    UUIDTaggedItem = apps.get_model("blog", "UUIDTaggedItem")
+    names = (
+        UUIDTaggedItem.objects.filter(object_id=OuterRef("pk"))
+        .order_by()
+        .values("object_id")
+        .annotate(names=ArrayAgg("tag__name", ordering="tag__name"))
+        .values("names")
+    )
+    tagged = UUIDTaggedItem.objects.values("object_id")
+    Post.objects.filter(pk__in=tagged).update(tag_names=Subquery(names))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0012_post_comments_updated_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="tag_names",
+            field=django.contrib.postgres.fields.ArrayField(
+                base_field=models.CharField(max_length=100),
+                blank=True,
+                default=list,
+                editable=False,
+                size=None,
+            ),
+        ),
+        migrations.RunPython(copy_tag_names, migrations.RunPython.noop),
+    ]
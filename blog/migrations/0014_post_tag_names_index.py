@@ -0,0 +1,23 @@
+# Generated by Django 4.0.5 on 2026-10-18 11:55
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    # Build the index without blocking writes on a big table.
+    atomic = False
+
+    dependencies = [
+        ("blog", "0013_post_tag_names"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="post",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["tag_names"], name="blog_post_tag_names_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 4.0.5 on 2026-10-18 11:58
+
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+import django.db.models.deletion
+import django.db.models.functions.text
+
+
+COUNT_TAGS = """
+INSERT INTO blog_tagcount (tag_id, name, posts_count)
+SELECT tag.id, tag.name, COUNT(post.id)
+FROM taggit_tag tag
+LEFT JOIN blog_uuidtaggeditem item ON item.tag_id = tag.id
+LEFT JOIN blog_post post ON post.id = item.object_id AND post.is_active
+GROUP BY tag.id;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("taggit", "0005_auto_20220424_2025"),
+        ("blog", "0014_post_tag_names_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TagCount",
+            fields=[
+                (
+                    "tag",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="count",
+                        serialize=False,
+                        to="taggit.tag",
+                    ),
+                ),
+                ("name", models.CharField(max_length=100)),
+                ("posts_count", models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="tagcount",
+            index=models.Index(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("name"),
+                    name="text_pattern_ops",
+                ),
+                name="blog_tagcount_name_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="tagcount",
+            index=models.Index(
+                fields=["-posts_count", "name"], name="blog_tagcount_popular_idx"
+            ),
+        ),
+        migrations.RunSQL(COUNT_TAGS, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 4.0.5 on 2026-10-18 12:24
+
+from django.db import migrations
+from django.db.models import Count
+
+SLUG_LENGTH = 50
+
+
+def dedupe_slugs(apps, schema_editor):
+    """
+    Suffix slugs of every post but the oldest among posts of an author
+    sharing a slug, like Post.save does for new posts.
+    """
+    Post = apps.get_model("blog", "Post")
+    duplicates = (
+        Post.objects.order_by()
+        .values("author_id", "slug")
+        .annotate(count=Count("pk"))
+        .filter(count__gt=1)
+    )
+    for duplicate in duplicates:
+        posts = Post.objects.filter(author_id=duplicate["author_id"])
+        taken = set(posts.values_list("slug", flat=True))
+        renamed = (
+            posts.filter(slug=duplicate["slug"])
+            .order_by("created_at", "id")
+            .values_list("pk", flat=True)[1:]
+        )
+        base, number = duplicate["slug"] or "post", 1
+        for pk in renamed:
+            slug = base
+            while slug in taken:
+                number += 1
+                suffix = f"-{number}"
+                slug = base[: SLUG_LENGTH - len(suffix)] + suffix
+            taken.add(slug)
+            Post.objects.filter(pk=pk).update(slug=slug)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0015_tagcount"),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe_slugs, migrations.RunPython.noop),
+    ]
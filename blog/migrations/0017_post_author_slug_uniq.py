@@ -0,0 +1,48 @@
+# Generated by Django 4.0.5 on 2026-10-18 12:24
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Build the indexes without blocking writes on a big table.
+    atomic = False
+
+    dependencies = [
+        ("blog", "0016_dedupe_post_slugs"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="post",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["slug", "created_at"],
+                name="blog_post_slug_idx",
+            ),
+        ),
+        # The unique index is built concurrently, then turned into the
+        # constraint.
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(
+                    "CREATE UNIQUE INDEX CONCURRENTLY blog_post_author_slug_uniq "
+                    "ON blog_post (author_id, slug)",
+                    "DROP INDEX CONCURRENTLY IF EXISTS blog_post_author_slug_uniq",
+                ),
+                migrations.RunSQL(
+                    "ALTER TABLE blog_post ADD CONSTRAINT blog_post_author_slug_uniq "
+                    "UNIQUE USING INDEX blog_post_author_slug_uniq",
+                    "ALTER TABLE blog_post DROP CONSTRAINT blog_post_author_slug_uniq",
+                ),
+            ],
+            state_operations=[
+                migrations.AddConstraint(
+                    model_name="post",
+                    constraint=models.UniqueConstraint(
+                        fields=("author", "slug"), name="blog_post_author_slug_uniq"
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.0.5 on 2026-10-18 12:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0017_post_author_slug_uniq"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="comment",
+            name="is_hidden",
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.0.5 on 2026-10-18 13:10
+
+from django.db import migrations
+
+# Comments older than 0011 all got the same created_at default, the earliest
+# one. Spread them after the created_at of their post in table order, which
+# follows insertion order closely, so they no longer tie.
+BACKFILL_CREATED_AT = """
+WITH migrated AS (
+    SELECT created_at, COUNT(*) AS count
+    FROM blog_comment
+    GROUP BY created_at
+    ORDER BY created_at
+    LIMIT 1
+), numbered AS (
+    SELECT comment.id, post.created_at + INTERVAL '1 microsecond' * ROW_NUMBER()
+        OVER (PARTITION BY comment.post_id ORDER BY comment.ctid) AS created_at
+    FROM blog_comment comment
+    JOIN migrated ON migrated.created_at = comment.created_at AND migrated.count > 1
+    JOIN blog_post post ON post.id = comment.post_id
+)
+UPDATE blog_comment comment
+SET created_at = numbered.created_at
+FROM numbered
+WHERE comment.id = numbered.id;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0018_comment_is_hidden"),
+    ]
+
+    operations = [
+        migrations.RunSQL(BACKFILL_CREATED_AT, migrations.RunSQL.noop),
+    ]
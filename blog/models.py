@@ -1,10 +1,18 @@
+import re
 from uuid import uuid4
 
 from django.conf import settings
-from django.db import models
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
+from django.db import IntegrityError, connection, models, transaction
+from django.db.models import F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest, Upper
 from django.template.defaultfilters import slugify
+from django.utils import timezone
 from taggit.managers import TaggableManager
-from taggit.models import GenericUUIDTaggedItemBase, TaggedItemBase
+from taggit.models import GenericUUIDTaggedItemBase, Tag, TaggedItemBase
 
 
 class UUIDTaggedItem(GenericUUIDTaggedItemBase, TaggedItemBase):
@@ -17,6 +25,101 @@ class UUIDTaggedItem(GenericUUIDTaggedItemBase, TaggedItemBase):
         verbose_name_plural = "Tags"
 
 
+# Max length of Post.slug, and room kept for a collision suffix like -12.
+SLUG_LENGTH = 50
+SLUG_SUFFIX_LENGTH = 7
+# Unique constraint of the slugs of an author.
+SLUG_CONSTRAINT = "blog_post_author_slug_uniq"
+
+# Type of Post.tag_names.
+TAG_NAMES_FIELD = ArrayField(models.CharField(max_length=100))
+
+
+class PostQuerySet(models.QuerySet):
+    def with_tags(self):
+        """
+        Load tags of every post in the queryset with a single query.
+        """
+        return self.prefetch_related("tags")
+
+    def feed_for(self, user):
+        """
+        Return all posts if user have staff permission.
+        else, active posts only. Newest first.
+        """
+        queryset = self.select_related("author").with_tags()
+        if not user.is_staff:
+            queryset = queryset.filter(is_active=True)
+        return queryset.order_by("-created_at", "-id")
+
+    def only_fields(self, fields):
+        """
+        Load only what serializer fields need: their columns, the author
+        join for author and the tags prefetch for tags.
+        """
+        queryset = self
+        columns = ["id"] + [name for name in fields if name not in ("author", "tags")]
+        if "author" in fields:
+            columns.append("author__username")
+        else:
+            queryset = queryset.select_related(None)
+        if "tags" not in fields:
+            queryset = queryset.prefetch_related(None)
+        return queryset.only(*columns)
+
+    def free_slugs(self, author_id, titles):
+        """
+        Return a slug for each title that no post of the author in the
+        queryset uses, suffixed with -2, -3... on collisions.
+        Slugs in use are read with a single query.
+        """
+        bases = [slugify(title)[:SLUG_LENGTH] or "post" for title in titles]
+        stems = {base[: SLUG_LENGTH - SLUG_SUFFIX_LENGTH] for base in bases}
+        taken = set(
+            self.filter(
+                author_id=author_id,
+                slug__regex="^(" + "|".join(map(re.escape, stems)) + ")",
+            ).values_list("slug", flat=True)
+        )
+        slugs = []
+        for base in bases:
+            slug, number = base, 1
+            while slug in taken:
+                number += 1
+                suffix = f"-{number}"
+                slug = base[: SLUG_LENGTH - len(suffix)] + suffix
+            taken.add(slug)
+            slugs.append(slug)
+        return slugs
+
+    def comments_changed(self, delta=0):
+        """
+        Record that comments of the posts changed, adjusting their
+        comments count by delta.
+        """
+        return self.update(
+            comments_count=F("comments_count") + delta,
+            comments_updated_at=timezone.now(),
+        )
+
+    def tags_changed(self):
+        """
+        Record that tags of the posts changed, copying their names to
+        tag_names.
+        """
+        names = (
+            UUIDTaggedItem.objects.filter(object_id=OuterRef("pk"))
+            .order_by()
+            .values("object_id")
+            .annotate(names=ArrayAgg("tag__name", ordering="tag__name"))
+            .values("names")
+        )
+        return self.update(
+            tag_names=Coalesce(Subquery(names), Value([], TAG_NAMES_FIELD)),
+            updated_at=timezone.now(),
+        )
+
+
 class Post(models.Model):
     """
     Model representing a Post in a database
@@ -25,22 +128,85 @@ class Post(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid4, editable=False)
     title = models.CharField(max_length=255)
     description = models.TextField()
-    slug = models.SlugField(blank=True)
+    # Unique per author, set from the title on creation.
+    slug = models.SlugField(max_length=SLUG_LENGTH, blank=True)
     tags = TaggableManager(through=UUIDTaggedItem)
+    # Sorted names of tags, kept in sync with tags for fast filtering.
+    tag_names = ArrayField(
+        models.CharField(max_length=100), default=list, blank=True, editable=False
+    )
     is_active = models.BooleanField(default=True)
     author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    comments_count = models.PositiveIntegerField(default=0, editable=False)
+    comments_updated_at = models.DateTimeField(null=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Maintained by the blog_post_search_vector_update database trigger.
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = PostQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Feed of non-staff users.
+            models.Index(
+                fields=["-created_at", "-id"],
+                name="blog_post_active_feed_idx",
+                condition=models.Q(is_active=True),
+            ),
+            # Feed of staff users.
+            models.Index(fields=["-created_at", "-id"], name="blog_post_feed_idx"),
+            GinIndex(fields=["search_vector"], name="blog_post_search_idx"),
+            GinIndex(fields=["tag_names"], name="blog_post_tag_names_idx"),
+            # Permalinks without author resolve to the oldest active post.
+            models.Index(
+                fields=["slug", "created_at"],
+                name="blog_post_slug_idx",
+                condition=models.Q(is_active=True),
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=["author", "slug"], name=SLUG_CONSTRAINT),
+        ]
 
     def __str__(self):
         return self.title
 
     def save(self, *args, **kwargs):
-        if not self.slug:
-            self.slug = slugify(self.title)
+        if self.slug:
+            return super().save(*args, **kwargs)
 
+        others = Post.objects.exclude(pk=self.pk)
+        self.slug = others.free_slugs(self.author_id, [self.title])[0]
+        try:
+            with transaction.atomic():
+                return super().save(*args, **kwargs)
+        except IntegrityError as exc:
+            diag = getattr(exc.__cause__, "diag", None)
+            if getattr(diag, "constraint_name", None) != SLUG_CONSTRAINT:
+                raise
+        # A concurrent post of the author took the slug, pick another once.
+        self.slug = others.free_slugs(self.author_id, [self.title])[0]
         return super().save(*args, **kwargs)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        post = super().from_db(db, field_names, values)
+        # Saved is_active, so signals can tell when it changes.
+        post._saved_is_active = post.__dict__.get("is_active")
+        return post
+
+
+class CommentQuerySet(models.QuerySet):
+    def visible_to(self, user):
+        """
+        Return all comments if user have staff permission.
+        else, comments that are not hidden only.
+        """
+        if user.is_staff:
+            return self
+        return self.filter(is_hidden=False)
+
 
 class Comment(models.Model):
     """
@@ -51,6 +217,110 @@ class Comment(models.Model):
     text = models.TextField()
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name="comments")
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Hidden by staff, not listed to other users nor counted in
+    # Post.comments_count.
+    is_hidden = models.BooleanField(default=False)
+
+    objects = CommentQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["post", "created_at", "id"],
+                name="blog_comment_post_created_idx",
+            )
+        ]
 
     def __str__(self):
         return self.text
+
+
+class OutboxEmail(models.Model):
+    """
+    Model representing an email waiting to be sent by the send_outbox command.
+    """
+
+    subject = models.TextField()
+    message = models.TextField()
+    from_email = models.EmailField()
+    recipient = models.EmailField()
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    attempted_at = models.DateTimeField(null=True, blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["created_at"],
+                name="blog_outbox_pending_idx",
+                condition=models.Q(sent_at__isnull=True),
+            )
+        ]
+
+    def __str__(self):
+        return self.subject
+
+
+class TagCountQuerySet(models.QuerySet):
+    def refresh(self, tag_ids=None):
+        """
+        Recount active posts of the tags with tag_ids, or of every tag.
+        """
+        where = "" if tag_ids is None else "WHERE tag.id = ANY(%s)"
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                INSERT INTO {TagCount._meta.db_table} (tag_id, name, posts_count)
+                SELECT tag.id, tag.name, COUNT(post.id)
+                FROM {Tag._meta.db_table} tag
+                LEFT JOIN {UUIDTaggedItem._meta.db_table} item
+                    ON item.tag_id = tag.id
+                LEFT JOIN {Post._meta.db_table} post
+                    ON post.id = item.object_id AND post.is_active
+                {where}
+                GROUP BY tag.id
+                ON CONFLICT (tag_id) DO UPDATE
+                SET name = EXCLUDED.name, posts_count = EXCLUDED.posts_count
+                """,
+                None if tag_ids is None else [list(tag_ids)],
+            )
+
+    def posts_changed(self, delta):
+        """
+        Adjust the posts count of the tags by delta.
+        """
+        return self.update(posts_count=Greatest(F("posts_count") + delta, 0))
+
+
+class TagCount(models.Model):
+    """
+    Number of active posts of a tag, kept up to date by blog.signals and
+    the refresh_tag_counts command.
+    """
+
+    tag = models.OneToOneField(
+        Tag, primary_key=True, on_delete=models.CASCADE, related_name="count"
+    )
+    # Copy of the tag name, so autocomplete needs no join.
+    name = models.CharField(max_length=100)
+    posts_count = models.PositiveIntegerField(default=0)
+
+    objects = TagCountQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Prefix search of name__istartswith.
+            models.Index(
+                OpClass(Upper("name"), name="text_pattern_ops"),
+                name="blog_tagcount_name_idx",
+            ),
+            models.Index(
+                fields=["-posts_count", "name"], name="blog_tagcount_popular_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return self.name
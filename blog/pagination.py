@@ -1,6 +1,32 @@
-from rest_framework.pagination import PageNumberPagination
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (
+    Cursor,
+    CursorPagination,
+    PageNumberPagination,
+    _reverse_ordering,
+)
 from rest_framework.response import Response
 
+from .counts import get_count
+
+
+class CountStrategyPaginator(Paginator):
+    """
+    Paginator that counts objects with blog.counts.get_count,
+    exposing whether the count is exact in count_is_exact.
+    """
+
+    @cached_property
+    def count(self):
+        count, self.count_is_exact = get_count(self.object_list)
+        return count
+
 
 class DefaultPageNumberPagination(PageNumberPagination):
     """
@@ -8,6 +34,7 @@ class DefaultPageNumberPagination(PageNumberPagination):
     """
 
     page_size = 25
+    django_paginator_class = CountStrategyPaginator
 
     def get_paginated_response(self, data):
         return Response(
@@ -17,6 +44,140 @@ class DefaultPageNumberPagination(PageNumberPagination):
                     "previous": self.get_previous_link(),
                 },
                 "count": self.page.paginator.count,
+                "count_exact": self.page.paginator.count_is_exact,
+                "results": data,
+            }
+        )
+
+
+class DefaultCursorPagination(CursorPagination):
+    """
+    Keyset pagination that list 25 objects per page.
+
+    Cursors hold the values of every ordering field of the last item, and
+    pages are filtered on the whole ordering tuple. The ordering must end
+    with a unique field, so every page costs the same regardless of its
+    depth, with no offset inside ties of the first field.
+    The list is only counted when requested with ?count=true.
+    """
+
+    page_size = 25
+    count_query_param = "count"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count = self.count_is_exact = None
+        if request.query_params.get(self.count_query_param) == "true":
+            self.count, self.count_is_exact = get_count(queryset)
+
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor is not None and self.cursor.reverse
+
+        ordering = _reverse_ordering(self.ordering) if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if self.cursor is not None and self.cursor.position is not None:
+            queryset = queryset.filter(
+                self.get_keyset_filter(ordering, self.cursor.position)
+            )
+
+        results = list(queryset[: self.page_size + 1])
+        self.page = results[: self.page_size]
+        has_following = len(results) > self.page_size
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = True, has_following
+        else:
+            self.has_next, self.has_previous = has_following, self.cursor is not None
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def get_keyset_filter(self, ordering, position):
+        """
+        Filter for rows after position in ordering, i.e. the row comparison
+        (a, b, c) > (x, y, z) spelled as a > x OR (a = x AND b > y) OR ...
+        The bound on the first field alone lets the ordering index be used.
+        """
+        try:
+            values = json.loads(position)
+            if not isinstance(values, list) or len(values) != len(ordering):
+                raise ValueError(position)
+            keyset = Q()
+            equal = {}
+            for order, value in zip(ordering, values):
+                field = order.lstrip("-")
+                lookup = "lt" if order.startswith("-") else "gt"
+                keyset |= Q(**equal, **{f"{field}__{lookup}": value})
+                equal[field] = value
+            first = ordering[0].lstrip("-")
+            bound = "lte" if ordering[0].startswith("-") else "gte"
+            return Q(**{f"{first}__{bound}": values[0]}) & keyset
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        if self.page:
+            position = self._get_position_from_instance(self.page[-1], self.ordering)
+        else:
+            position = self.cursor.position
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=position))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if self.page:
+            position = self._get_position_from_instance(self.page[0], self.ordering)
+        else:
+            position = self.cursor.position
+        return self.encode_cursor(Cursor(offset=0, reverse=True, position=position))
+
+    def _get_position_from_instance(self, instance, ordering):
+        fields = [order.lstrip("-") for order in ordering]
+        if isinstance(instance, dict):
+            values = [instance[field] for field in fields]
+        else:
+            values = [getattr(instance, field) for field in fields]
+        return json.dumps([str(value) for value in values])
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "links": {
+                    "next": self.get_next_link(),
+                    "previous": self.get_previous_link(),
+                },
+                "count": self.count,
+                "count_exact": self.count_is_exact,
                 "results": data,
             }
         )
+
+
+class PostCursorPagination(DefaultCursorPagination):
+    """
+    Keyset pagination over (created_at, id), newest posts first.
+    Posts created in the same instant are paged by id.
+    """
+
+    ordering = ("-created_at", "-id")
+
+
+class PostSearchCursorPagination(PostCursorPagination):
+    """
+    Keyset pagination for full-text search results, best matches first.
+    Cursors hold the rank, which is filtered on like a column.
+    """
+
+    ordering = ("-rank", "-created_at", "-id")
+
+
+class CommentCursorPagination(DefaultCursorPagination):
+    """
+    Keyset pagination over (created_at, id), oldest comments first.
+    """
+
+    ordering = ("created_at", "id")
@@ -0,0 +1,38 @@
+import json
+
+from django.conf import settings
+from rest_framework.parsers import BaseParser
+
+
+class JSONLinesParser(BaseParser):
+    """
+    Parses a JSON Lines body lazily, one object per line.
+    Returns a generator of (line number, object) pairs so the body is never
+    loaded in memory at once. Line numbers count blank lines, which are
+    skipped. Lines that are not valid JSON, or not valid text in the request
+    encoding, are yielded as their raw text, leaving the error to serializer
+    validation.
+    """
+
+    media_type = "application/x-ndjson"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        return self._parse_lines(stream, encoding)
+
+    def _parse_lines(self, stream, encoding):
+        if stream is None:
+            return
+        for number, line in enumerate(stream, 1):
+            try:
+                line = line.decode(encoding).strip()
+            except UnicodeDecodeError:
+                yield number, line.decode(encoding, errors="replace").strip()
+                continue
+            if not line:
+                continue
+            try:
+                yield number, json.loads(line)
+            except ValueError:
+                yield number, line
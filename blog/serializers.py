@@ -1,22 +1,57 @@
+from collections import defaultdict
+from operator import itemgetter
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
 from rest_framework import serializers
 from taggit.serializers import TaggitSerializer, TagListSerializerField
 
-from .models import Comment, Post
+from core.metrics import record_serialization
+from core.serializers import TimedListSerializer, TimedSerializerMixin
+
+from .models import Comment, Post, TagCount, UUIDTaggedItem
+
+
+class SortedTagListSerializerField(TagListSerializerField):
+    """
+    Tag names in alphabetical order, prefetched tags come unordered.
+    """
+
+    def to_representation(self, value):
+        return sorted(super().to_representation(value))
+
+
+class SparseFieldsMixin:
+    """
+    Serialize only the fields named in the fields argument, if given.
+    """
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
 
 
-class PostSerializer(TaggitSerializer, serializers.ModelSerializer):
+class PostSerializer(
+    TimedSerializerMixin,
+    SparseFieldsMixin,
+    TaggitSerializer,
+    serializers.ModelSerializer,
+):
     """
     Serializer for Post Model.
     -> tags (https://django-taggit.readthedocs.io/en/latest/serializers.html)
     -> Represent author with its string representation
     """
 
-    tags = TagListSerializerField()
+    tags = SortedTagListSerializerField()
     author = serializers.StringRelatedField()
     comments_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Post
+        list_serializer_class = TimedListSerializer
         fields = [
             "id",
             "title",
@@ -37,7 +72,9 @@ class PostSerializer(TaggitSerializer, serializers.ModelSerializer):
         """
         Create Post object with passed in user as author, and validated datas.
         """
-        return Post.objects.create(author=self.context["author"], **validated_data)
+        tags, validated_data = self._pop_tags(validated_data)
+        post = Post.objects.create(author=self.context["author"], **validated_data)
+        return self._save_tags(post, tags)
 
 
 class PostListSerializer(PostSerializer):
@@ -59,7 +96,68 @@ class PostListSerializer(PostSerializer):
         ]
 
 
-class CommentSerializer(serializers.ModelSerializer):
+def get_tag_names(post_ids):
+    """
+    Return sorted tag names of each post id, with a single query.
+    """
+    names = defaultdict(list)
+    tagged_items = UUIDTaggedItem.objects.filter(
+        content_type=ContentType.objects.get_for_model(Post), object_id__in=post_ids
+    ).values_list("object_id", "tag__name")
+    for post_id, name in tagged_items:
+        names[post_id].append(name)
+    for post_names in names.values():
+        post_names.sort()
+    return names
+
+
+class PostFeedSerializer:
+    """
+    Read-only serializer of post list pages, from values() rows.
+
+    Gives the same data as PostListSerializer without building model
+    instances or running serializer fields for every row.
+    """
+
+    def __init__(self, rows, fields=None):
+        self.rows = rows
+        self.fields = PostListSerializer.Meta.fields if fields is None else fields
+
+    @staticmethod
+    def get_values(fields):
+        """
+        Return columns to load with values() for fields.
+        """
+        # Tags are loaded by id, User.__str__ is the username.
+        columns = {"tags": "id", "author": "author__username"}
+        return list(
+            dict.fromkeys(["id"] + [columns.get(name, name) for name in fields])
+        )
+
+    @property
+    def data(self):
+        with record_serialization():
+            return self.serialize()
+
+    def serialize(self):
+        rows = list(self.rows)
+        tag_names = {}
+        if rows and "tags" in self.fields:
+            tag_names = get_tag_names([row["id"] for row in rows])
+        # Handles the time zone and format settings like PostListSerializer.
+        datetime = serializers.DateTimeField().to_representation
+        getters = {
+            "id": lambda row: str(row["id"]),
+            "tags": lambda row: tag_names.get(row["id"], []),
+            "author": itemgetter("author__username"),
+            "created_at": lambda row: datetime(row["created_at"]),
+            "updated_at": lambda row: datetime(row["updated_at"]),
+        }
+        getters = [(name, getters.get(name, itemgetter(name))) for name in self.fields]
+        return [{name: getter(row) for name, getter in getters} for row in rows]
+
+
+class CommentSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """
     Serializer for Comment Model
     """
@@ -68,10 +166,16 @@ class CommentSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Comment
+        list_serializer_class = TimedListSerializer
         fields = [
             "id",
             "text",
             "user",
+            "is_hidden",
+            "created_at",
+        ]
+        read_only_fields = [
+            "is_hidden",
         ]
 
     def create(self, validated_data):
@@ -81,3 +185,29 @@ class CommentSerializer(serializers.ModelSerializer):
         return Comment.objects.create(
             user=self.context["user"], post_id=self.context["post_pk"], **validated_data
         )
+
+
+class CommentModerationSerializer(serializers.Serializer):
+    """
+    Ids of the comments to moderate.
+    """
+
+    ids = serializers.ListField(
+        child=serializers.UUIDField(),
+        allow_empty=False,
+        max_length=settings.BLOG_BULK_COMMENTS_MAX,
+    )
+
+
+class TagCountSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """
+    Serializer for tags with their number of active posts.
+    """
+
+    class Meta:
+        model = TagCount
+        list_serializer_class = TimedListSerializer
+        fields = [
+            "name",
+            "posts_count",
+        ]
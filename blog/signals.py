@@ -0,0 +1,92 @@
+from django.db import transaction
+from django.db.models import Exists
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from taggit.models import Tag
+
+from .cache import bump_version
+from .models import Comment, Post, TagCount, UUIDTaggedItem
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+@receiver(post_save, sender=UUIDTaggedItem)
+@receiver(post_delete, sender=UUIDTaggedItem)
+@receiver(post_save, sender=Tag)
+def invalidate_response_cache(sender, **kwargs):
+    """
+    Invalidate cached post responses when posts, comments or tags change.
+    The version is bumped once the change is committed, else a concurrent
+    read could cache the old data under the new version.
+    """
+    transaction.on_commit(bump_version)
+
+
+@receiver(post_save, sender=UUIDTaggedItem)
+@receiver(post_delete, sender=UUIDTaggedItem)
+def touch_tagged_post(sender, instance, **kwargs):
+    """
+    Mark the post as updated when its tags change, so its ETag and
+    tag_names change.
+    """
+    Post.objects.filter(pk=instance.object_id).tags_changed()
+
+
+@receiver(post_save, sender=Tag)
+def save_tag_count(sender, instance, created, **kwargs):
+    """
+    Keep a TagCount of every tag. Renamed tags are renamed in tag_names of
+    their posts too.
+    """
+    if created:
+        TagCount.objects.create(tag=instance, name=instance.name)
+        return
+    renamed = (
+        TagCount.objects.filter(tag=instance)
+        .exclude(name=instance.name)
+        .update(name=instance.name)
+    )
+    if renamed:
+        tagged = UUIDTaggedItem.objects.filter(tag=instance).values("object_id")
+        Post.objects.filter(pk__in=tagged).tags_changed()
+
+
+@receiver(post_save, sender=UUIDTaggedItem)
+@receiver(post_delete, sender=UUIDTaggedItem)
+def count_tagged_post(sender, instance, signal, created=True, **kwargs):
+    """
+    Count the post for its tag while the post is active.
+    """
+    if not created:
+        return
+    active = Post.objects.filter(pk=instance.object_id, is_active=True)
+    TagCount.objects.filter(tag_id=instance.tag_id).filter(
+        Exists(active)
+    ).posts_changed(-1 if signal is post_delete else 1)
+
+
+@receiver(post_save, sender=Post)
+def count_activated_post(sender, instance, created, **kwargs):
+    """
+    Count or uncount the post for its tags when it is activated or
+    deactivated.
+    """
+    saved_is_active = getattr(instance, "_saved_is_active", None)
+    instance._saved_is_active = instance.is_active
+    if created or saved_is_active is None or saved_is_active == instance.is_active:
+        return
+    tags = UUIDTaggedItem.objects.filter(object_id=instance.pk).values("tag_id")
+    TagCount.objects.filter(tag__in=tags).posts_changed(1 if instance.is_active else -1)
+
+
+@receiver(pre_delete, sender=Post)
+def uncount_deleted_post(sender, instance, **kwargs):
+    """
+    Uncount an active post for its tags before it is deleted. It is
+    deactivated first, so deleting its tagged items does not uncount it again.
+    """
+    if Post.objects.filter(pk=instance.pk, is_active=True).update(is_active=False):
+        tags = UUIDTaggedItem.objects.filter(object_id=instance.pk).values("tag_id")
+        TagCount.objects.filter(tag__in=tags).posts_changed(-1)
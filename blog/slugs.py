@@ -0,0 +1,92 @@
+"""
+Post ids of permalinks, by author and slug or by slug alone.
+
+Ids are cached in a small LRU of each process in front of the shared
+cache. Entries are never invalidated on writes: the post is always read
+with its slug, so a stale id finds nothing and is forgotten.
+"""
+from collections import OrderedDict
+from threading import Lock
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Post
+
+SLUG_KEY = "blog:slug:{}:{}"
+
+
+class LRUCache:
+    """
+    Thread-safe mapping keeping the most recently used maxsize items.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.items = OrderedDict()
+        self.lock = Lock()
+
+    def get(self, key):
+        with self.lock:
+            value = self.items.get(key)
+            if value is not None:
+                self.items.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            self.items[key] = value
+            self.items.move_to_end(key)
+            if len(self.items) > self.maxsize:
+                self.items.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.items.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.items.clear()
+
+
+local_cache = LRUCache(settings.BLOG_SLUG_CACHE_SIZE)
+
+
+def _find_post_id(author, slug):
+    """
+    Return id of the post of author with slug, or of the oldest active post
+    with slug without author.
+    """
+    if author is not None:
+        posts = Post.objects.filter(author__username=author, slug=slug)
+    else:
+        posts = Post.objects.filter(slug=slug, is_active=True).order_by(
+            "created_at", "id"
+        )
+    return posts.values_list("pk", flat=True).first()
+
+
+def get_post_id(author, slug):
+    """
+    Return id of the permalink's post, or None if there is none.
+    """
+    key = SLUG_KEY.format(author or "", slug)
+    pk = local_cache.get(key)
+    if pk is None:
+        pk = cache.get(key)
+        if pk is None:
+            pk = _find_post_id(author, slug)
+            if pk is None:
+                return None
+            cache.set(key, pk, settings.BLOG_SLUG_CACHE_TIMEOUT)
+        local_cache.set(key, pk)
+    return pk
+
+
+def forget_post_id(author, slug):
+    """
+    Drop a stale id of the permalink from both caches.
+    """
+    key = SLUG_KEY.format(author or "", slug)
+    local_cache.delete(key)
+    cache.delete(key)
@@ -0,0 +1,129 @@
+from blog.models import Comment, Post
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+from user.models import User
+
+BASE_URL = "/api/async/post/"
+
+
+class TestAsyncPost(APITestCase):
+    def setUp(self):
+        self.normal_user = User.objects.create(
+            username="test", email="test@mail.com", password="testuser"
+        )
+        self.post1 = Post.objects.create(
+            title="test", description="test", author=self.normal_user
+        )
+        self.post1.tags.add("tag1")
+        self.post2 = Post.objects.create(
+            title="inactive",
+            description="test",
+            author=self.normal_user,
+            is_active=False,
+        )
+        token = RefreshToken.for_user(self.normal_user).access_token
+        self.auth = {"HTTP_AUTHORIZATION": f"JWT {token}"}
+
+    def test_async_post_list_matches_sync_list(self):
+        self.client.force_authenticate(self.normal_user)
+        expected = self.client.get("/api/post/?pagination=cursor").json()
+        self.client.force_authenticate(None)
+
+        response = self.client.get(BASE_URL, **self.auth)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["results"], expected["results"])
+        self.assertIsNone(response.json()["count"])
+
+    def test_async_post_list_returns_401_for_anonymous_user(self):
+        response = self.client.get(BASE_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_async_post_list_returns_401_for_invalid_token(self):
+        response = self.client.get(BASE_URL, HTTP_AUTHORIZATION="JWT invalid")
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_async_post_list_can_be_filtered_by_tag(self):
+        response = self.client.get(f"{BASE_URL}?tags__name=missing", **self.auth)
+
+        self.assertEqual(response.json()["results"], [])
+
+    def test_async_post_detail_returns_description(self):
+        response = self.client.get(f"{BASE_URL}{self.post1.id}/", **self.auth)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["description"], "test")
+        self.assertEqual(response.json()["tags"], ["tag1"])
+
+    def test_async_post_detail_returns_404_for_inactive_post(self):
+        response = self.client.get(f"{BASE_URL}{self.post2.id}/", **self.auth)
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class TestAsyncPostSearch(APITestCase):
+    def setUp(self):
+        self.normal_user = User.objects.create(
+            username="test", email="test@mail.com", password="testuser"
+        )
+        self.in_title = Post.objects.create(
+            title="Running django in production",
+            description="test",
+            author=self.normal_user,
+        )
+        # Newer, so date order is the reverse of rank order.
+        self.in_description = Post.objects.create(
+            title="Deployment notes",
+            description="How we run django behind nginx",
+            author=self.normal_user,
+        )
+        token = RefreshToken.for_user(self.normal_user).access_token
+        self.auth = {"HTTP_AUTHORIZATION": f"JWT {token}"}
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_async_post_search_is_ranked_like_sync_search(self):
+        self.client.force_authenticate(self.normal_user)
+        expected = self.client.get("/api/post/?search=django").json()
+        self.client.force_authenticate(None)
+
+        response = self.client.get(f"{BASE_URL}?search=django", **self.auth)
+
+        ids = [post["id"] for post in response.json()["results"]]
+        self.assertEqual(ids, [str(self.in_title.id), str(self.in_description.id)])
+        self.assertEqual(response.json()["results"], expected["results"])
+
+
+class TestAsyncComment(APITestCase):
+    def setUp(self):
+        self.normal_user = User.objects.create(
+            username="test", email="test@mail.com", password="testuser"
+        )
+        self.post1 = Post.objects.create(
+            title="test", description="test", author=self.normal_user
+        )
+        self.comment = Comment.objects.create(
+            text="test", user=self.normal_user, post=self.post1
+        )
+        token = RefreshToken.for_user(self.normal_user).access_token
+        self.auth = {"HTTP_AUTHORIZATION": f"JWT {token}"}
+
+    def test_async_comment_list_returns_comments(self):
+        response = self.client.get(f"{BASE_URL}{self.post1.id}/comments/", **self.auth)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["results"][0]["text"], "test")
+        self.assertEqual(response.json()["results"][0]["user"], "test")
+
+    def test_async_comment_detail_returns_comment(self):
+        response = self.client.get(
+            f"{BASE_URL}{self.post1.id}/comments/{self.comment.id}/", **self.auth
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["id"], str(self.comment.id))
@@ -1,4 +1,12 @@
+from io import StringIO
+from uuid import uuid4
+
 from blog.models import Comment, Post
+from blog.tests.utils import QueryPlanMixin
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
 from rest_framework.test import APITestCase
 from user.models import User
@@ -61,3 +69,403 @@ class TestCommentCreate(APITestCase):
         response = self.client.post(f"/api/post/{post_id}/comments/", data=data)
 
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_comment_create_increments_post_comments_count(self):
+        self.client.force_authenticate(self.normal_user)
+        data = {"text": "test"}
+
+        self.client.post(f"/api/post/{self.post1.id}/comments/", data=data)
+        self.post1.refresh_from_db()
+
+        self.assertEqual(self.post1.comments_count, 1)
+
+
+class TestCommentDelete(APITestCase):
+    def setUp(self):
+        self.normal_user = User.objects.create(
+            username="test", email="test@mail.com", password="testuser"
+        )
+        self.post1 = Post.objects.create(
+            title="test", description="test", author=self.normal_user
+        )
+        self.comment = Comment.objects.create(
+            text="test", user=self.normal_user, post=self.post1
+        )
+        Post.objects.filter(pk=self.post1.pk).update(comments_count=1)
+
+    def test_comment_delete_decrements_post_comments_count(self):
+        self.client.force_authenticate(self.normal_user)
+
+        response = self.client.delete(
+            f"/api/post/{self.post1.id}/comments/{self.comment.id}/"
+        )
+        self.post1.refresh_from_db()
+
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(self.post1.comments_count, 0)
+
+    def test_recount_comments_fixes_drifted_counts(self):
+        Post.objects.filter(pk=self.post1.pk).update(comments_count=5)
+
+        call_command("recount_comments", stdout=StringIO())
+        self.post1.refresh_from_db()
+
+        self.assertEqual(self.post1.comments_count, 1)
+
+
+class TestCommentList(QueryPlanMixin, APITestCase):
+    def setUp(self):
+        self.normal_user = User.objects.create(
+            username="test", email="test@mail.com", password="testuser"
+        )
+        self.post1 = Post.objects.create(
+            title="test", description="test", author=self.normal_user
+        )
+        self.comments = [
+            Comment.objects.create(
+                text=f"comment {i}", user=self.normal_user, post=self.post1
+            )
+            for i in range(30)
+        ]
+
+    def test_comment_list_is_paginated_oldest_first(self):
+        self.client.force_authenticate(self.normal_user)
+
+        first = self.client.get(f"/api/post/{self.post1.id}/comments/?count=true")
+        second = self.client.get(first.data["links"]["next"])
+
+        texts = [c["text"] for c in first.data["results"] + second.data["results"]]
+        self.assertEqual(len(first.data["results"]), 25)
+        self.assertEqual(texts, [f"comment {i}" for i in range(30)])
+        self.assertEqual(first.data["count"], 30)
+        self.assertIsNone(second.data["links"]["next"])
+
+    def test_comment_list_pages_through_ties_by_id(self):
+        self.client.force_authenticate(self.normal_user)
+        Comment.objects.update(created_at=self.post1.created_at)
+        url = f"/api/post/{self.post1.id}/comments/"
+
+        first = self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            second = self.client.get(first.data["links"]["next"])
+
+        ids = [c["id"] for c in first.data["results"] + second.data["results"]]
+        expected = Comment.objects.order_by("id").values_list("id", flat=True)
+        self.assertEqual(ids, [str(pk) for pk in expected])
+        self.assertFalse(any("OFFSET" in query["sql"] for query in queries))
+
+    def test_comment_list_uses_post_created_index(self):
+        # Statistics of a table of a few rows, e.g. from autovacuum, make
+        # sorting the comments of a post cheaper than reading them in order.
+        Comment.objects.bulk_create(
+            Comment(text=f"comment {i}", user=self.normal_user, post=self.post1)
+            for i in range(500)
+        )
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE blog_comment")
+        queryset = Comment.objects.filter(post=self.post1).order_by("created_at", "id")
+
+        self.assertUsesIndex(queryset[:25], "blog_comment_post_created_idx")
+
+    def test_comment_list_returns_304_for_current_etag(self):
+        self.client.force_authenticate(self.normal_user)
+        url = f"/api/post/{self.post1.id}/comments/"
+        etag = self.client.get(url)["ETag"]
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_comment_edit_changes_comment_list_etag(self):
+        self.client.force_authenticate(self.normal_user)
+        url = f"/api/post/{self.post1.id}/comments/"
+        etag = self.client.get(url)["ETag"]
+
+        self.client.put(f"{url}{self.comments[0].id}/", data={"text": "edited"})
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["results"][0]["text"], "edited")
+
+
+class TestCommentBulkCreate(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(
+            username="test", email="test@mail.com", password="testuser"
+        )
+        self.post = Post.objects.create(
+            title="test", description="test", author=self.user
+        )
+        self.url = f"/api/post/{self.post.id}/comments/bulk/"
+        self.client.force_authenticate(self.user)
+
+    def test_bulk_create_returns_result_of_each_comment(self):
+        response = self.client.post(
+            self.url,
+            data=[{"text": "first"}, {"text": ""}, {"text": "second"}],
+            format="json",
+        )
+        self.post.refresh_from_db()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data["results"]
+        self.assertEqual(
+            [result["status"] for result in results], ["created", "invalid", "created"]
+        )
+        self.assertEqual(results[0]["comment"]["text"], "first")
+        self.assertEqual(results[0]["comment"]["user"], "test")
+        self.assertIn("text", results[1]["errors"])
+        self.assertEqual(self.post.comments.count(), 2)
+        self.assertEqual(self.post.comments_count, 2)
+
+    def test_bulk_create_inserts_comments_with_a_single_query(self):
+        # Post, savepoint, comments count, insert, release savepoint
+        with self.assertNumQueries(5):
+            self.client.post(
+                self.url, data=[{"text": str(i)} for i in range(20)], format="json"
+            )
+
+        self.assertEqual(self.post.comments.count(), 20)
+
+    def test_bulk_create_returns_404_for_unknown_post(self):
+        response = self.client.post(
+            f"/api/post/{uuid4()}/comments/bulk/",
+            data=[{"text": "test"}],
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertFalse(Comment.objects.exists())
+
+    def test_bulk_create_of_invalid_comments_returns_404_for_unknown_post(self):
+        response = self.client.post(
+            f"/api/post/{uuid4()}/comments/bulk/", data=[{"text": ""}], format="json"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    @override_settings(BLOG_BULK_COMMENTS_MAX=2)
+    def test_bulk_create_rejects_too_many_comments(self):
+        response = self.client.post(
+            self.url, data=[{"text": "test"}] * 3, format="json"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Comment.objects.exists())
+
+    def test_bulk_create_rejects_non_list_body(self):
+        response = self.client.post(self.url, data={"text": "test"})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class TestCommentModeration(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(
+            username="test", email="test@mail.com", password="testuser"
+        )
+        self.staff_user = User.objects.create(
+            username="staff", email="staff@mail.com", password="testuser", is_staff=True
+        )
+        self.post1 = Post.objects.create(
+            title="test", description="test", author=self.user
+        )
+        self.post2 = Post.objects.create(
+            title="other", description="test", author=self.user
+        )
+        self.comments = [
+            Comment.objects.create(text=str(i), user=self.user, post=post)
+            for i, post in enumerate([self.post1, self.post1, self.post2])
+        ]
+        Post.objects.filter(pk=self.post1.pk).update(comments_count=2)
+        Post.objects.filter(pk=self.post2.pk).update(comments_count=1)
+        self.client.force_authenticate(self.staff_user)
+
+    def moderate(self, operation, comments, extra_ids=()):
+        ids = [str(comment.id) for comment in comments] + list(extra_ids)
+        return self.client.post(
+            f"/api/comments/{operation}/", data={"ids": ids}, format="json"
+        )
+
+    def assertCommentsCounts(self, post1, post2):
+        self.post1.refresh_from_db()
+        self.post2.refresh_from_db()
+        self.assertEqual(
+            [self.post1.comments_count, self.post2.comments_count], [post1, post2]
+        )
+
+    def test_hide_hides_comments_across_posts(self):
+        missing = str(uuid4())
+
+        response = self.moderate("hide", self.comments[1:], [missing])
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [result["status"] for result in response.data["results"]],
+            ["hidden", "hidden", "not_found"],
+        )
+        self.assertEqual(Comment.objects.filter(is_hidden=True).count(), 2)
+        self.assertCommentsCounts(1, 0)
+
+    def test_hide_leaves_hidden_comments_unchanged(self):
+        self.moderate("hide", self.comments[:1])
+
+        response = self.moderate("hide", self.comments[:2])
+
+        self.assertEqual(
+            [result["status"] for result in response.data["results"]],
+            ["unchanged", "hidden"],
+        )
+        self.assertCommentsCounts(0, 1)
+
+    def test_unhide_counts_comments_again(self):
+        self.moderate("hide", self.comments)
+
+        response = self.moderate("unhide", self.comments[:1])
+
+        self.assertEqual(response.data["results"][0]["status"], "unhidden")
+        self.assertCommentsCounts(1, 0)
+
+    def test_delete_deletes_comments_with_a_single_query(self):
+        self.moderate("hide", self.comments[:1])
+
+        # Savepoint, select, delete, one count update per delta, release
+        with self.assertNumQueries(5):
+            response = self.moderate("delete", self.comments)
+
+        self.assertEqual(
+            [result["status"] for result in response.data["results"]],
+            ["deleted"] * 3,
+        )
+        self.assertFalse(Comment.objects.exists())
+        self.assertCommentsCounts(0, 0)
+
+    def test_moderation_changes_comment_list_etag(self):
+        url = f"/api/post/{self.post1.id}/comments/"
+        etag = self.client.get(url)["ETag"]
+
+        self.moderate("hide", self.comments[:1])
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_moderation_returns_403_for_non_staff_user(self):
+        self.client.force_authenticate(self.user)
+
+        response = self.moderate("delete", self.comments)
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(Comment.objects.count(), 3)
+
+    def test_moderation_rejects_invalid_ids(self):
+        response = self.client.post("/api/comments/hide/", data={"ids": ["x"]})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class TestHiddenComment(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(
+            username="test", email="test@mail.com", password="testuser"
+        )
+        self.staff_user = User.objects.create(
+            username="staff", email="staff@mail.com", password="testuser", is_staff=True
+        )
+        self.post = Post.objects.create(
+            title="test", description="test", author=self.user
+        )
+        self.visible = Comment.objects.create(
+            text="visible", user=self.user, post=self.post
+        )
+        self.hidden = Comment.objects.create(
+            text="hidden", user=self.user, post=self.post, is_hidden=True
+        )
+        self.url = f"/api/post/{self.post.id}/comments/"
+
+    def test_hidden_comments_are_listed_to_staff_only(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.get(self.url)
+        self.client.force_authenticate(self.staff_user)
+        staff_response = self.client.get(self.url, HTTP_IF_NONE_MATCH=response["ETag"])
+
+        self.assertEqual(
+            [comment["text"] for comment in response.data["results"]], ["visible"]
+        )
+        self.assertEqual(staff_response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(staff_response.data["results"]), 2)
+
+    def test_hidden_comment_returns_404_for_non_staff_user(self):
+        self.client.force_authenticate(self.user)
+
+        response = self.client.get(f"{self.url}{self.hidden.id}/")
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_recount_comments_skips_hidden_comments(self):
+        call_command("recount_comments", stdout=StringIO())
+        self.post.refresh_from_db()
+
+        self.assertEqual(self.post.comments_count, 1)
+
+    def test_deleting_hidden_comment_keeps_comments_count(self):
+        Post.objects.filter(pk=self.post.pk).update(comments_count=1)
+        self.client.force_authenticate(self.staff_user)
+
+        self.client.delete(f"{self.url}{self.hidden.id}/")
+        self.post.refresh_from_db()
+
+        self.assertEqual(self.post.comments_count, 1)
+
+
+class TestCommentAdmin(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(
+            username="admin",
+            email="admin@mail.com",
+            password="testuser",
+            is_staff=True,
+            is_superuser=True,
+        )
+        self.post1 = Post.objects.create(
+            title="test", description="test", author=self.user
+        )
+        self.post2 = Post.objects.create(
+            title="other", description="test", author=self.user
+        )
+        self.comment = Comment.objects.create(
+            text="test", user=self.user, post=self.post1
+        )
+        Post.objects.filter(pk=self.post1.pk).update(comments_count=1)
+        self.client.force_login(self.user)
+
+    def change(self, **data):
+        return self.client.post(
+            f"/admin/blog/comment/{self.comment.id}/change/",
+            data={"text": "test", "user": self.user.pk, "post": self.post1.pk, **data},
+        )
+
+    def assertCommentsCounts(self, post1, post2):
+        self.post1.refresh_from_db()
+        self.post2.refresh_from_db()
+        self.assertEqual(
+            [self.post1.comments_count, self.post2.comments_count], [post1, post2]
+        )
+
+    def test_moving_comment_moves_its_count(self):
+        response = self.change(post=self.post2.pk)
+
+        self.assertEqual(response.status_code, status.HTTP_302_FOUND)
+        self.assertCommentsCounts(0, 1)
+
+    def test_moving_hidden_comment_keeps_counts(self):
+        Comment.objects.filter(pk=self.comment.pk).update(is_hidden=True)
+        Post.objects.filter(pk=self.post1.pk).update(comments_count=0)
+
+        self.change(post=self.post2.pk, is_hidden="on")
+
+        self.assertCommentsCounts(0, 0)
+
+    def test_hiding_comment_uncounts_it(self):
+        self.change(is_hidden="on")
+
+        self.assertCommentsCounts(0, 0)
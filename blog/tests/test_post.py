@@ -1,7 +1,33 @@
-from blog.models import Post
+import json
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from blog.bulk import import_posts
+from blog.cache import bump_version, get_stats, get_version
+from blog.models import (
+    Comment,
+    OutboxEmail,
+    Post,
+    PostQuerySet,
+    TagCount,
+    UUIDTaggedItem,
+)
+from blog.serializers import PostFeedSerializer, PostListSerializer
+from blog.slugs import local_cache
+from blog.tests.utils import QueryPlanMixin
 from django.core import mail
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count
+from django.template.defaultfilters import slugify
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APITestCase
+from taggit.models import Tag
 from user.models import User
 
 BASE_URL = "/api/post/"
@@ -42,7 +68,7 @@ class TestPostCreate(APITestCase):
 
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
 
-    def test_post_create_sends_email(self):
+    def test_post_create_queues_email(self):
         self.client.force_authenticate(self.normal_user)
 
         response = self.client.post(
@@ -51,11 +77,65 @@ class TestPostCreate(APITestCase):
             format="json",
         )
 
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(OutboxEmail.objects.filter(sent_at__isnull=True).count(), 1)
+
+    def test_post_create_sends_email_from_outbox(self):
+        self.client.force_authenticate(self.normal_user)
+
+        response = self.client.post(
+            f"{BASE_URL}",
+            data=self.data,
+            format="json",
+        )
+        call_command("send_outbox", stdout=StringIO())
+
         self.assertEqual(len(mail.outbox), 1)
-        self.assertIsNotNone(mail.outbox[0].subject)
+        self.assertEqual(mail.outbox[0].subject, "Post created: test")
+        self.assertEqual(mail.outbox[0].to, ["test@mail.com"])
+        self.assertEqual(OutboxEmail.objects.filter(sent_at__isnull=True).count(), 0)
+
+
+class TestSendOutbox(APITestCase):
+    def test_send_outbox_sends_every_batch(self):
+        OutboxEmail.objects.bulk_create(
+            OutboxEmail(
+                subject=f"test {i}",
+                message="test",
+                from_email="sulav@admin.com",
+                recipient="test@mail.com",
+            )
+            for i in range(7)
+        )
+
+        call_command("send_outbox", batch_size=2, workers=2, stdout=StringIO())
+
+        self.assertEqual(len(mail.outbox), 7)
+        self.assertFalse(OutboxEmail.objects.filter(sent_at__isnull=True).exists())
+
+    def test_send_outbox_records_failures_for_retry(self):
+        email = OutboxEmail.objects.create(
+            subject="invalid\nsubject",
+            message="test",
+            from_email="sulav@admin.com",
+            recipient="test@mail.com",
+        )
+
+        call_command("send_outbox", stdout=StringIO())
+        call_command("send_outbox", max_attempts=2, stdout=StringIO())
+        call_command("send_outbox", max_attempts=2, stdout=StringIO())
+        email.refresh_from_db()
+
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertIsNone(email.sent_at)
+        self.assertEqual(email.attempts, 2)
+        self.assertIn("BadHeaderError", email.last_error)
 
 
 class TestPostList(APITestCase):
+    def tearDown(self):
+        cache.clear()
+
     def setUp(self):
         self.normal_user = User.objects.create(
             username="test", email="test@mail.com", password="testuser"
@@ -99,6 +179,953 @@ class TestPostList(APITestCase):
 
         self.assertEqual(response.data["count"], 2)
 
+    def test_post_list_count_is_exact_below_threshold(self):
+        self.client.force_authenticate(self.normal_user)
+
+        response = self.client.get(f"{BASE_URL}")
+
+        self.assertTrue(response.data["count_exact"])
+
+    @override_settings(BLOG_COUNT_EXACT_THRESHOLD=0)
+    def test_post_list_count_is_estimated_above_threshold(self):
+        self.client.force_authenticate(self.normal_user)
+
+        response = self.client.get(f"{BASE_URL}")
+
+        self.assertFalse(response.data["count_exact"])
+        self.assertIsInstance(response.data["count"], int)
+
+    def test_post_list_cursor_pagination_returns_links_and_results(self):
+        self.client.force_authenticate(self.normal_user)
+
+        response = self.client.get(f"{BASE_URL}?pagination=cursor")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNone(response.data["count"])
+        self.assertIsNone(response.data["links"]["next"])
+        self.assertEqual(len(response.data["results"]), 1)
+
+    def test_post_list_cursor_pagination_counts_on_request(self):
+        self.client.force_authenticate(self.normal_user)
+
+        response = self.client.get(f"{BASE_URL}?pagination=cursor&count=true")
+
+        self.assertEqual(response.data["count"], 1)
+        self.assertTrue(response.data["count_exact"])
+
+    def test_post_list_caches_exact_count(self):
+        self.client.force_authenticate(self.staff_user)
+        self.client.get(f"{BASE_URL}")
+
+        # Page, tags
+        with self.assertNumQueries(2):
+            response = self.client.get(f"{BASE_URL}")
+
+        self.assertEqual(response.data["count"], 2)
+        self.assertTrue(response.data["count_exact"])
+
+    def test_post_list_cursor_pagination_follows_next_link(self):
+        self.client.force_authenticate(self.staff_user)
+        for i in range(30):
+            Post.objects.create(
+                title=f"post {i}", description="test", author=self.staff_user
+            )
+
+        first = self.client.get(f"{BASE_URL}?pagination=cursor")
+        second = self.client.get(first.data["links"]["next"])
+
+        ids = [post["id"] for post in first.data["results"] + second.data["results"]]
+        self.assertEqual(len(first.data["results"]), 25)
+        self.assertEqual(len(ids), 32)
+        self.assertEqual(len(set(ids)), 32)
+        self.assertIsNone(second.data["links"]["next"])
+
+    def test_post_list_cursor_pagination_pages_through_ties_by_id(self):
+        self.client.force_authenticate(self.staff_user)
+        for i in range(60):
+            Post.objects.create(
+                title=f"post {i}", description="test", author=self.staff_user
+            )
+        Post.objects.update(created_at=self.post1.created_at)
+
+        first = self.client.get(f"{BASE_URL}?pagination=cursor")
+        second = self.client.get(first.data["links"]["next"])
+        with CaptureQueriesContext(connection) as queries:
+            third = self.client.get(second.data["links"]["next"])
+        back = self.client.get(third.data["links"]["previous"])
+
+        pages = [first, second, third]
+        ids = [post["id"] for page in pages for post in page.data["results"]]
+        expected = Post.objects.order_by("-id").values_list("id", flat=True)
+        self.assertEqual(ids, [str(pk) for pk in expected])
+        self.assertEqual(back.data["results"], second.data["results"])
+        self.assertFalse(any("OFFSET" in query["sql"] for query in queries))
+
+    def test_post_list_cursor_pagination_rejects_invalid_cursor(self):
+        self.client.force_authenticate(self.normal_user)
+
+        response = self.client.get(f"{BASE_URL}?pagination=cursor&cursor=cD1bMV0=")
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class TestPostListQueries(APITestCase):
+    def tearDown(self):
+        cache.clear()
+
+    def setUp(self):
+        self.normal_user = User.objects.create(
+            username="test", email="test@mail.com", password="testuser"
+        )
+        self.staff_user = User.objects.create(
+            username="staff", email="staff@mail.com", password="testuser", is_staff=True
+        )
+        for i in range(30):
+            post = Post.objects.create(
+                title=f"post {i}", description="test", author=self.normal_user
+            )
+            post.tags.add(f"tag{i}", "common")
+
+    def test_post_list_loads_tags_in_a_single_query(self):
+        self.client.force_authenticate(self.normal_user)
+
+        # Count estimate, count, page, tags
+        with self.assertNumQueries(4):
+            response = self.client.get(f"{BASE_URL}")
+
+        self.assertEqual(len(response.data["results"]), 25)
+        self.assertEqual(len(response.data["results"][0]["tags"]), 2)
+
+    def test_staff_post_list_loads_tags_in_a_single_query(self):
+        self.client.force_authenticate(self.staff_user)
+
+        with self.assertNumQueries(4):
+            self.client.get(f"{BASE_URL}")
+
+
+class TestPostFeedSerializer(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(
+            username="test", email="test@mail.com", password="testuser"
+        )
+        self.staff_user = User.objects.create(
+            username="staff", email="staff@mail.com", password="testuser", is_staff=True
+        )
+        tagged = Post.objects.create(
+            title="Django tips", description="test", author=self.user
+        )
+        tagged.tags.add("zeta", "alpha", "mid")
+        Post.objects.create(
+            title="untagged", description="test", author=self.staff_user
+        )
+        inactive = Post.objects.create(
+            title="inactive", description="test", author=self.user, is_active=False
+        )
+        inactive.tags.add("alpha")
+
+    def tearDown(self):
+        cache.clear()
+
+    def assertSameJSON(self, user, path=BASE_URL):
+        self.client.force_authenticate(user)
+        queryset = Post.objects.feed_for(user)
+        expected = JSONRenderer().render(PostListSerializer(queryset, many=True).data)
+
+        response = self.client.get(path)
+
+        self.assertEqual(JSONRenderer().render(response.data["results"]), expected)
+
+    def test_feed_serializer_matches_post_list_serializer(self):
+        queryset = Post.objects.feed_for(self.staff_user)
+
+        data = PostFeedSerializer(
+            queryset.prefetch_related(None).values(
+                *PostFeedSerializer.get_values(PostListSerializer.Meta.fields)
+            )
+        ).data
+
+        self.assertEqual(
+            JSONRenderer().render(data),
+            JSONRenderer().render(PostListSerializer(queryset, many=True).data),
+        )
+        self.assertEqual(data[-1]["tags"], ["alpha", "mid", "zeta"])
+
+    def test_post_list_renders_same_json_as_post_list_serializer(self):
+        self.assertSameJSON(self.user)
+        self.assertSameJSON(self.staff_user)
+        self.assertSameJSON(self.user, f"{BASE_URL}?pagination=cursor")
+
+    def test_post_search_renders_same_json_as_post_list_serializer(self):
+        self.client.force_authenticate(self.user)
+
+        response = self.client.get(f"{BASE_URL}?search=django")
+
+        post = Post.objects.get(title="Django tips")
+        self.assertEqual(
+            response.data["results"], PostListSerializer([post], many=True).data
+        )
+
+
+class TestPostSparseFields(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(
+            username="test", email="test@mail.com", password="testuser"
+        )
+        for i in range(30):
+            post = Post.objects.create(
+                title=f"post {i}", description="test", author=self.user
+            )
+            post.tags.add(f"tag{i}", "common")
+        self.post = post
+        self.client.force_authenticate(self.user)
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_post_list_returns_only_requested_fields(self):
+        # Count estimate, count, page
+        with self.assertNumQueries(3), CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f"{BASE_URL}?fields=slug,id,title")
+
+        self.assertEqual(list(response.data["results"][0]), ["id", "title", "slug"])
+        self.assertNotIn("user_user", queries[-1]["sql"])
+
+    def test_post_list_excludes_fields(self):
+        with self.assertNumQueries(3):
+            response = self.client.get(f"{BASE_URL}?exclude=tags,author")
+
+        self.assertEqual(
+            list(response.data["results"][0]),
+            [
+                "id",
+                "title",
+                "slug",
+                "is_active",
+                "comments_count",
+                "created_at",
+                "updated_at",
+            ],
+        )
+
+    def test_post_list_with_cursor_pagination_returns_requested_fields(self):
+        first = self.client.get(f"{BASE_URL}?pagination=cursor&fields=title")
+        second = self.client.get(first.data["links"]["next"])
+
+        self.assertEqual(list(first.data["results"][0]), ["title"])
+        self.assertEqual(len(first.data["results"]) + len(second.data["results"]), 30)
+
+    def test_post_list_rejects_unknown_fields(self):
+        response = self.client.get(f"{BASE_URL}?fields=title,description,secret")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            response.data, {"fields": ["Unknown fields: description, secret."]}
+        )
+
+    def test_post_retrieve_loads_only_requested_fields(self):
+        # ETag version, post
+        with self.assertNumQueries(2), CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                f"{BASE_URL}{self.post.id}/?fields=id,title,description"
+            )
+
+        self.assertEqual(
+            response.data,
+            {"id": str(self.post.id), "title": "post 29", "description": "test"},
+        )
+        self.assertNotIn("user_user", queries[-1]["sql"])
+        self.assertNotIn('"blog_post"."slug"', queries[-1]["sql"])
+
+    def test_post_retrieve_with_author_and_tags(self):
+        # ETag version, post with author, tags
+        with self.assertNumQueries(3):
+            response = self.client.get(f"{BASE_URL}{self.post.id}/?fields=author,tags")
+
+        self.assertEqual(response.data, {"tags": ["common", "tag29"], "author": "test"})
+
+
+class TestPostResponseCache(APITestCase):
+    def setUp(self):
+        # Versions are only bumped on commit, responses of other tests
+        # could still be cached.
+        cache.clear()
+        self.normal_user = User.objects.create(
+            username="test", email="test@mail.com", password="testuser"
+        )
+        self.staff_user = User.objects.create(
+            username="staff", email="staff@mail.com", password="testuser", is_staff=True
+        )
+        self.post1 = Post.objects.create(
+            title="test", description="test", author=self.normal_user
+        )
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_post_list_is_served_from_cache(self):
+        self.client.force_authenticate(self.normal_user)
+        stats = get_stats()
+
+        first = self.client.get(f"{BASE_URL}")
+        with self.assertNumQueries(0):
+            second = self.client.get(f"{BASE_URL}")
+
+        self.assertEqual(first["X-Cache"], "MISS")
+        self.assertEqual(second["X-Cache"], "HIT")
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(get_stats()["hits"], stats["hits"] + 1)
+        self.assertEqual(get_stats()["misses"], stats["misses"] + 1)
+
+    def test_post_retrieve_is_served_from_cache(self):
+        self.client.force_authenticate(self.normal_user)
+
+        self.client.get(f"{BASE_URL}{self.post1.id}/")
+        response = self.client.get(f"{BASE_URL}{self.post1.id}/")
+
+        self.assertEqual(response["X-Cache"], "HIT")
+
+    def test_cache_is_keyed_by_query_params(self):
+        self.client.force_authenticate(self.normal_user)
+
+        self.client.get(f"{BASE_URL}")
+        response = self.client.get(f"{BASE_URL}?page=1")
+
+        self.assertEqual(response["X-Cache"], "MISS")
+
+    def test_cache_is_invalidated_once_committed(self):
+        self.client.force_authenticate(self.normal_user)
+        version = get_version()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post1.title = "updated"
+            self.post1.save()
+            # Read before the commit, cached under the current version.
+            before_commit = self.client.get(f"{BASE_URL}")
+            self.assertEqual(get_version(), version)
+        response = self.client.get(f"{BASE_URL}")
+
+        self.assertEqual(before_commit["X-Cache"], "MISS")
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertNotEqual(get_version(), version)
+
+    def test_post_save_invalidates_cache(self):
+        self.client.force_authenticate(self.normal_user)
+
+        self.client.get(f"{BASE_URL}")
+        self.post1.title = "updated"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post1.save()
+        response = self.client.get(f"{BASE_URL}")
+
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.data["results"][0]["title"], "updated")
+
+    def test_comment_and_tag_changes_invalidate_cache(self):
+        self.client.force_authenticate(self.normal_user)
+
+        self.client.get(f"{BASE_URL}{self.post1.id}/")
+        with self.captureOnCommitCallbacks(execute=True):
+            Comment.objects.create(text="test", user=self.normal_user, post=self.post1)
+        after_comment = self.client.get(f"{BASE_URL}{self.post1.id}/")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post1.tags.add("new")
+        after_tag = self.client.get(f"{BASE_URL}{self.post1.id}/")
+
+        self.assertEqual(after_comment["X-Cache"], "MISS")
+        self.assertEqual(after_tag["X-Cache"], "MISS")
+        self.assertEqual(after_tag.data["tags"], ["new"])
+
+    def test_staff_responses_are_not_cached(self):
+        self.client.force_authenticate(self.staff_user)
+
+        self.client.get(f"{BASE_URL}")
+        response = self.client.get(f"{BASE_URL}")
+
+        self.assertFalse(response.has_header("X-Cache"))
+
+
+class TestPostSearch(APITestCase):
+    def setUp(self):
+        self.normal_user = User.objects.create(
+            username="test", email="test@mail.com", password="testuser"
+        )
+        self.in_title = Post.objects.create(
+            title="Running django in production",
+            description="test",
+            author=self.normal_user,
+        )
+        self.in_description = Post.objects.create(
+            title="Deployment notes",
+            description="How we run django behind nginx",
+            author=self.normal_user,
+        )
+        self.in_description.tags.add("nginx")
+        Post.objects.create(
+            title="Unrelated", description="Nothing to see", author=self.normal_user
+        )
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_post_search_returns_ranked_matches(self):
+        self.client.force_authenticate(self.normal_user)
+
+        response = self.client.get(f"{BASE_URL}?search=django")
+
+        ids = [post["id"] for post in response.data["results"]]
+        self.assertEqual(ids, [str(self.in_title.id), str(self.in_description.id)])
+
+    def test_post_search_matches_stemmed_words(self):
+        self.client.force_authenticate(self.normal_user)
+
+        response = self.client.get(f"{BASE_URL}?search=runs")
+
+        self.assertEqual(len(response.data["results"]), 2)
+
+    def test_post_search_sees_updated_title(self):
+        self.client.force_authenticate(self.normal_user)
+        self.in_title.title = "Running flask in production"
+        self.in_title.save()
+
+        response = self.client.get(f"{BASE_URL}?search=flask")
+
+        self.assertEqual(response.data["results"][0]["id"], str(self.in_title.id))
+
+    def test_post_search_can_be_filtered_by_tag(self):
+        self.client.force_authenticate(self.normal_user)
+
+        response = self.client.get(f"{BASE_URL}?search=django&tags__name=nginx")
+
+        ids = [post["id"] for post in response.data["results"]]
+        self.assertEqual(ids, [str(self.in_description.id)])
+
+    def test_post_search_is_cursor_paginated(self):
+        self.client.force_authenticate(self.normal_user)
+        for i in range(30):
+            Post.objects.create(
+                title=f"django {i}",
+                description="django " * (i % 3),
+                author=self.normal_user,
+            )
+
+        first = self.client.get(f"{BASE_URL}?search=django")
+        second = self.client.get(first.data["links"]["next"])
+
+        ids = [post["id"] for post in first.data["results"] + second.data["results"]]
+        self.assertEqual(len(ids), 32)
+        self.assertEqual(len(set(ids)), 32)
+        self.assertIsNone(second.data["links"]["next"])
+
+    def test_post_search_pages_through_rank_ties_without_offset(self):
+        self.client.force_authenticate(self.normal_user)
+        for i in range(60):
+            Post.objects.create(
+                title="django", description="django", author=self.normal_user
+            )
+        Post.objects.update(created_at=self.in_title.created_at)
+
+        first = self.client.get(f"{BASE_URL}?search=django")
+        second = self.client.get(first.data["links"]["next"])
+        with CaptureQueriesContext(connection) as queries:
+            third = self.client.get(second.data["links"]["next"])
+
+        pages = [first, second, third]
+        ids = [post["id"] for page in pages for post in page.data["results"]]
+        self.assertEqual(len(ids), 62)
+        self.assertEqual(len(set(ids)), 62)
+        self.assertIsNone(third.data["links"]["next"])
+        self.assertFalse(any("OFFSET" in query["sql"] for query in queries))
+
+
+class TestPostTags(APITestCase):
+    def setUp(self):
+        self.normal_user = User.objects.create(
+            username="test", email="test@mail.com", password="testuser"
+        )
+        self.django = Post.objects.create(
+            title="django", description="test", author=self.normal_user
+        )
+        self.django.tags.add("python", "django")
+        self.nginx = Post.objects.create(
+            title="nginx", description="test", author=self.normal_user
+        )
+        self.nginx.tags.add("nginx", "django")
+        self.untagged = Post.objects.create(
+            title="untagged", description="test", author=self.normal_user
+        )
+
+    def tearDown(self):
+        cache.clear()
+
+    def get_titles(self, query):
+        self.client.force_authenticate(self.normal_user)
+        response = self.client.get(f"{BASE_URL}?{query}")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return sorted(post["title"] for post in response.data["results"])
+
+    def test_tag_names_follow_tags(self):
+        self.django.refresh_from_db()
+        self.assertEqual(self.django.tag_names, ["django", "python"])
+
+        self.django.tags.remove("python")
+        self.django.refresh_from_db()
+        self.assertEqual(self.django.tag_names, ["django"])
+
+        self.django.tags.clear()
+        self.django.refresh_from_db()
+        self.assertEqual(self.django.tag_names, [])
+
+    def test_post_list_filters_posts_with_any_tag(self):
+        self.assertEqual(self.get_titles("tags=python,nginx"), ["django", "nginx"])
+
+    def test_post_list_filters_posts_with_all_tags(self):
+        self.assertEqual(self.get_titles("tags__all=python,django"), ["django"])
+
+    def test_post_list_returns_posts_with_many_matching_tags_once(self):
+        self.assertEqual(
+            self.get_titles("tags=python,django,nginx"), ["django", "nginx"]
+        )
+
+    def test_post_create_sets_tag_names(self):
+        self.client.force_authenticate(self.normal_user)
+
+        response = self.client.post(
+            BASE_URL,
+            {"title": "new", "description": "test", "tags": ["b", "a"]},
+            format="json",
+        )
+
+        post = Post.objects.get(pk=response.data["id"])
+        self.assertEqual(post.tag_names, ["a", "b"])
+
+
+class TestPostIndexes(QueryPlanMixin, APITestCase):
+    def setUp(self):
+        self.normal_user = User.objects.create(
+            username="test", email="test@mail.com", password="testuser"
+        )
+        Post.objects.create(title="test", description="test", author=self.normal_user)
+        # Statistics of a table of a few rows, e.g. from autovacuum, make
+        # every index as cheap as another.
+        Post.objects.bulk_create(
+            Post(
+                title=f"post {i}",
+                slug=f"post-{i}",
+                description="test",
+                author=self.normal_user,
+                is_active=i % 10 != 0,
+            )
+            for i in range(500)
+        )
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE blog_post")
+
+    def test_active_feed_uses_partial_index(self):
+        queryset = Post.objects.filter(is_active=True).order_by("-created_at", "-id")
+
+        self.assertUsesIndex(queryset[:25], "blog_post_active_feed_idx")
+
+    def test_staff_feed_uses_feed_index(self):
+        queryset = Post.objects.order_by("-created_at", "-id")
+
+        self.assertUsesIndex(queryset[:25], "blog_post_feed_idx")
+
+    def test_tag_filter_uses_tag_names_index(self):
+        queryset = Post.objects.filter(tag_names__overlap=["django", "nginx"])
+
+        self.assertUsesIndex(queryset, "blog_post_tag_names_idx")
+
+    def test_slug_lookup_uses_slug_index(self):
+        queryset = Post.objects.filter(slug="test")
+
+        self.assertUsesIndex(queryset, "blog_post_slug")
+
+
+class TestPostBulk(APITestCase):
+    def setUp(self):
+        self.normal_user = User.objects.create(
+            username="test", email="test@mail.com", password="testuser"
+        )
+
+    def test_post_import_creates_posts_with_tags(self):
+        self.client.force_authenticate(self.normal_user)
+        Tag.objects.create(name="existing")
+        lines = [
+            {"title": f"post {i}", "description": "test", "tags": ["new", "existing"]}
+            for i in range(5)
+        ]
+        body = "\n".join(json.dumps(line) for line in lines)
+
+        response = self.client.post(
+            f"{BASE_URL}import/", data=body, content_type="application/x-ndjson"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {"created": 5, "errors": []})
+        post = Post.objects.get(title="post 3")
+        self.assertEqual(post.slug, "post-3")
+        self.assertEqual(post.author, self.normal_user)
+        self.assertEqual(sorted(post.tags.names()), ["existing", "new"])
+        self.assertEqual(post.tag_names, ["existing", "new"])
+        self.assertEqual(Tag.objects.count(), 2)
+        self.assertEqual(TagCount.objects.get(name="new").posts_count, 5)
+        self.assertEqual(OutboxEmail.objects.count(), 1)
+
+    def test_post_import_reports_invalid_lines(self):
+        self.client.force_authenticate(self.normal_user)
+        body = "\n".join(
+            [
+                json.dumps({"title": "valid", "description": "test", "tags": []}),
+                json.dumps({"title": ""}),
+                "not json",
+            ]
+        )
+
+        response = self.client.post(
+            f"{BASE_URL}import/", data=body, content_type="application/x-ndjson"
+        )
+
+        self.assertEqual(response.data["created"], 1)
+        self.assertEqual([e["line"] for e in response.data["errors"]], [2, 3])
+
+    def test_post_import_counts_blank_lines(self):
+        self.client.force_authenticate(self.normal_user)
+        body = "\n".join(
+            [
+                json.dumps({"title": "valid", "description": "test", "tags": []}),
+                "",
+                "   ",
+                json.dumps({"title": ""}),
+            ]
+        )
+
+        response = self.client.post(
+            f"{BASE_URL}import/", data=body, content_type="application/x-ndjson"
+        )
+
+        self.assertEqual(response.data["created"], 1)
+        self.assertEqual([e["line"] for e in response.data["errors"]], [4])
+
+    def test_post_import_reports_lines_of_invalid_encoding(self):
+        self.client.force_authenticate(self.normal_user)
+        valid = json.dumps({"title": "valid", "description": "test", "tags": []})
+        body = b"\n".join([valid.encode(), b'{"title": "\xff"}', valid.encode()])
+
+        response = self.client.post(
+            f"{BASE_URL}import/", data=body, content_type="application/x-ndjson"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["created"], 2)
+        self.assertEqual([e["line"] for e in response.data["errors"]], [2])
+
+    def test_post_export_streams_json_lines(self):
+        self.client.force_authenticate(self.normal_user)
+        for i in range(3):
+            post = Post.objects.create(
+                title=f"post {i}", description="test", author=self.normal_user
+            )
+            post.tags.add(f"tag{i}")
+        Post.objects.create(
+            title="inactive",
+            description="test",
+            author=self.normal_user,
+            is_active=False,
+        )
+
+        response = self.client.get(f"{BASE_URL}export/")
+        lines = [
+            json.loads(line)
+            for line in b"".join(response.streaming_content).splitlines()
+        ]
+
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        self.assertEqual(
+            [line["title"] for line in lines], ["post 2", "post 1", "post 0"]
+        )
+        self.assertEqual(lines[0]["tags"], ["tag2"])
+        self.assertEqual(lines[0]["description"], "test")
+
+
+class TestSeedBlog(APITestCase):
+    def seed(self, **options):
+        options = {"users": 3, "posts": 20, "tags": 5, "comments": 50, **options}
+        call_command("seed_blog", batch_size=7, stdout=StringIO(), **options)
+
+    def assert_seeded(self):
+        self.assertEqual(User.objects.count(), 3)
+        self.assertEqual(Post.objects.count(), 20)
+        self.assertEqual(Tag.objects.count(), 5)
+        self.assertEqual(Comment.objects.count(), 50)
+        self.assertEqual(
+            sum(TagCount.objects.values_list("posts_count", flat=True)),
+            UUIDTaggedItem.objects.filter(
+                object_id__in=Post.objects.filter(is_active=True).values("id")
+            ).count(),
+        )
+        for post in Post.objects.annotate(total=Count("comments")):
+            self.assertEqual(post.comments_count, post.total)
+            self.assertEqual(post.slug, slugify(post.title)[:50])
+            self.assertEqual(post.tag_names, sorted(post.tags.names()))
+            self.assertIsNotNone(post.search_vector)
+
+    def test_seed_blog_with_copy(self):
+        self.seed()
+
+        self.assert_seeded()
+        self.assertTrue(UUIDTaggedItem.objects.exists())
+
+    def test_seed_blog_with_bulk_create(self):
+        self.seed(use_copy=False)
+
+        self.assert_seeded()
+
+    def test_same_seed_generates_same_posts(self):
+        self.seed(seed=1)
+        posts = list(Post.objects.values_list("id", "title").order_by("id"))
+        Post.objects.all().delete()
+        User.objects.all().delete()
+
+        self.seed(seed=1, use_copy=False)
+
+        self.assertEqual(
+            list(Post.objects.values_list("id", "title").order_by("id")), posts
+        )
+
+    def test_seed_blog_refuses_to_reuse_seed(self):
+        self.seed()
+
+        with self.assertRaises(CommandError):
+            self.seed()
+
+
+class TestPostConditionalGet(APITestCase):
+    def setUp(self):
+        self.normal_user = User.objects.create(
+            username="test", email="test@mail.com", password="testuser"
+        )
+        self.staff_user = User.objects.create(
+            username="staff", email="staff@mail.com", password="testuser", is_staff=True
+        )
+        self.post1 = Post.objects.create(
+            title="test", description="test", author=self.normal_user
+        )
+
+    def test_post_list_returns_304_for_current_etag(self):
+        self.client.force_authenticate(self.staff_user)
+        etag = self.client.get(f"{BASE_URL}")["ETag"]
+
+        response = self.client.get(f"{BASE_URL}", HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+        self.assertEqual(response.content, b"")
+
+    def test_post_list_etag_changes_with_posts(self):
+        self.client.force_authenticate(self.staff_user)
+        etag = self.client.get(f"{BASE_URL}")["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post1.delete()
+
+        response = self.client.get(f"{BASE_URL}", HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_post_list_etag_changes_with_author_username(self):
+        self.client.force_authenticate(self.staff_user)
+        etag = self.client.get(f"{BASE_URL}")["ETag"]
+        User.objects.filter(pk=self.normal_user.pk).update(username="renamed")
+
+        response = self.client.get(f"{BASE_URL}", HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_cached_post_list_returns_304_without_queries(self):
+        self.client.force_authenticate(self.normal_user)
+        etag = self.client.get(f"{BASE_URL}")["ETag"]
+
+        with self.assertNumQueries(0):
+            response = self.client.get(f"{BASE_URL}", HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_post_retrieve_returns_304_if_not_modified_since(self):
+        self.client.force_authenticate(self.staff_user)
+        response = self.client.get(f"{BASE_URL}{self.post1.id}/")
+
+        response = self.client.get(
+            f"{BASE_URL}{self.post1.id}/",
+            HTTP_IF_MODIFIED_SINCE=response["Last-Modified"],
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_post_retrieve_is_modified_by_new_comments(self):
+        self.client.force_authenticate(self.staff_user)
+        url = f"{BASE_URL}{self.post1.id}/"
+        # Last-Modified has a resolution of one second.
+        Post.objects.filter(pk=self.post1.pk).update(
+            updated_at=self.post1.updated_at - timedelta(seconds=2)
+        )
+        last_modified = self.client.get(url)["Last-Modified"]
+
+        self.client.post(f"{url}comments/", data={"text": "test"})
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["comments_count"], 1)
+
+    def test_post_retrieve_etag_changes_with_tags_and_comments(self):
+        self.client.force_authenticate(self.staff_user)
+        url = f"{BASE_URL}{self.post1.id}/"
+        first = self.client.get(url)["ETag"]
+
+        self.post1.tags.add("new")
+        second = self.client.get(url, HTTP_IF_NONE_MATCH=first)
+        self.client.post(f"{url}comments/", data={"text": "test"})
+        third = self.client.get(url, HTTP_IF_NONE_MATCH=second["ETag"])
+
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(third.status_code, status.HTTP_200_OK)
+        self.assertEqual(third.data["comments_count"], 1)
+
+
+class TestPostSlug(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(
+            username="test", email="test@mail.com", password="testuser"
+        )
+        self.other_user = User.objects.create(
+            username="other", email="other@mail.com", password="testuser"
+        )
+        self.client.force_authenticate(self.user)
+
+    def tearDown(self):
+        local_cache.clear()
+        cache.clear()
+
+    def create_post(self, title="Hello World", author=None, **kwargs):
+        return Post.objects.create(
+            title=title, description="test", author=author or self.user, **kwargs
+        )
+
+    def test_slug_collisions_of_an_author_are_suffixed(self):
+        slugs = [self.create_post().slug for _ in range(3)]
+
+        self.assertEqual(slugs, ["hello-world", "hello-world-2", "hello-world-3"])
+        self.assertEqual(self.create_post(author=self.other_user).slug, "hello-world")
+
+    def test_suffixed_slug_is_truncated(self):
+        title = "a" * 60
+
+        slugs = [self.create_post(title).slug for _ in range(2)]
+
+        self.assertEqual(slugs, ["a" * 50, "a" * 48 + "-2"])
+
+    def test_slug_taken_by_a_concurrent_post_is_picked_again(self):
+        self.create_post()
+        free_slugs = PostQuerySet.free_slugs
+        # The first lookup misses the post, as if it was not committed yet.
+        stale = iter([["hello-world"]])
+
+        def stale_free_slugs(queryset, author_id, titles):
+            return next(stale, None) or free_slugs(queryset, author_id, titles)
+
+        with mock.patch.object(PostQuerySet, "free_slugs", stale_free_slugs):
+            response = self.client.post(
+                BASE_URL,
+                data={"title": "Hello World", "description": "test", "tags": []},
+                format="json",
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["slug"], "hello-world-2")
+
+    def test_free_slugs_are_found_with_a_single_query(self):
+        self.create_post()
+
+        with self.assertNumQueries(1):
+            slugs = Post.objects.free_slugs(
+                self.user.id, ["Hello World", "Hello, world!", "other", "!!!"]
+            )
+
+        self.assertEqual(slugs, ["hello-world-2", "hello-world-3", "other", "post"])
+
+    def test_slug_is_unique_per_author(self):
+        self.create_post()
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            self.create_post(slug="hello-world")
+
+    def test_imported_posts_get_free_slugs(self):
+        self.create_post()
+
+        import_posts(
+            enumerate(
+                [{"title": "Hello World", "description": "test", "tags": []}] * 2
+            ),
+            self.user,
+        )
+
+        self.assertEqual(
+            sorted(Post.objects.values_list("slug", flat=True)),
+            ["hello-world", "hello-world-2", "hello-world-3"],
+        )
+
+    def test_post_is_retrieved_by_author_and_slug(self):
+        self.create_post(author=self.other_user)
+        post = self.create_post()
+
+        response = self.client.get(f"{BASE_URL}by-slug/test/hello-world/")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["id"], str(post.id))
+        self.assertEqual(response.data["description"], "test")
+
+    def test_slug_without_author_retrieves_oldest_active_post(self):
+        self.create_post(is_active=False)
+        post = self.create_post(author=self.other_user)
+        self.create_post()
+
+        response = self.client.get(f"{BASE_URL}by-slug/hello-world/?fields=id")
+
+        self.assertEqual(response.data, {"id": str(post.id)})
+
+    def test_unknown_slug_returns_404(self):
+        self.create_post(is_active=False)
+
+        for url in ("by-slug/hello-world/", "by-slug/other/hello-world/"):
+            with self.subTest(url=url):
+                response = self.client.get(f"{BASE_URL}{url}")
+
+                self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_cached_slug_skips_the_lookup(self):
+        self.create_post()
+        url = f"{BASE_URL}by-slug/test/hello-world/"
+        self.client.get(url)
+        bump_version()
+
+        # ETag version, post, tags
+        with self.assertNumQueries(3):
+            response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_stale_cached_slug_is_looked_up_again(self):
+        old_post = self.create_post()
+        url = f"{BASE_URL}by-slug/test/hello-world/"
+        self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            old_post.delete()
+            post = self.create_post()
+
+        response = self.client.get(url)
+
+        self.assertEqual(response.data["id"], str(post.id))
+
 
 class TestPostRetrieve(APITestCase):
     def setUp(self):
@@ -0,0 +1,137 @@
+from io import StringIO
+
+from blog.models import Post, TagCount
+from blog.tests.utils import QueryPlanMixin
+from django.core.cache import cache
+from django.core.management import call_command
+from rest_framework import status
+from rest_framework.test import APITestCase
+from taggit.models import Tag
+from user.models import User
+
+BASE_URL = "/api/tags/"
+
+
+class TestTagCount(APITestCase):
+    def setUp(self):
+        self.normal_user = User.objects.create(
+            username="test", email="test@mail.com", password="testuser"
+        )
+        self.post = Post.objects.create(
+            title="test", description="test", author=self.normal_user
+        )
+        self.post.tags.add("django", "python")
+        other = Post.objects.create(
+            title="other", description="test", author=self.normal_user
+        )
+        other.tags.add("django")
+
+    def get_counts(self):
+        return dict(TagCount.objects.values_list("name", "posts_count"))
+
+    def test_tag_counts_follow_tags(self):
+        self.assertEqual(self.get_counts(), {"django": 2, "python": 1})
+
+        self.post.tags.remove("python")
+
+        self.assertEqual(self.get_counts(), {"django": 2, "python": 0})
+
+    def test_tag_counts_follow_active_posts(self):
+        post = Post.objects.get(pk=self.post.pk)
+        post.is_active = False
+        post.save()
+
+        self.assertEqual(self.get_counts(), {"django": 1, "python": 0})
+
+        post.is_active = True
+        post.save()
+
+        self.assertEqual(self.get_counts(), {"django": 2, "python": 1})
+
+    def test_tag_counts_follow_deleted_posts(self):
+        self.post.delete()
+
+        self.assertEqual(self.get_counts(), {"django": 1, "python": 0})
+
+    def test_tag_count_follows_tag_name(self):
+        tag = Tag.objects.get(name="python")
+        tag.name = "Python"
+        tag.save()
+
+        self.assertEqual(self.get_counts(), {"django": 2, "Python": 1})
+
+    def test_renamed_tag_is_renamed_in_tagged_posts(self):
+        tag = Tag.objects.get(name="django")
+        tag.name = "Django"
+        with self.captureOnCommitCallbacks(execute=True):
+            tag.save()
+        self.client.force_authenticate(self.normal_user)
+
+        new_name = self.client.get("/api/post/?tags=Django")
+        old_name = self.client.get("/api/post/?tags=django")
+
+        self.assertEqual(len(new_name.data["results"]), 2)
+        self.assertEqual(old_name.data["results"], [])
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.tag_names, ["Django", "python"])
+
+    def test_refresh_tag_counts_recounts_every_tag(self):
+        Post.objects.filter(pk=self.post.pk).update(is_active=False)
+        TagCount.objects.update(posts_count=10)
+
+        call_command("refresh_tag_counts", stdout=StringIO())
+
+        self.assertEqual(self.get_counts(), {"django": 1, "python": 0})
+
+
+class TestTagList(QueryPlanMixin, APITestCase):
+    def setUp(self):
+        self.normal_user = User.objects.create(
+            username="test", email="test@mail.com", password="testuser"
+        )
+        for i, tags in enumerate(
+            [["python", "django"], ["django"], ["pytest"], ["unused"]]
+        ):
+            post = Post.objects.create(
+                title=f"post {i}",
+                description="test",
+                author=self.normal_user,
+                is_active=tags != ["unused"],
+            )
+            post.tags.add(*tags)
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_tag_list_returns_401_for_anonymous_users(self):
+        response = self.client.get(BASE_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_tag_list_returns_tags_of_active_posts_most_used_first(self):
+        self.client.force_authenticate(self.normal_user)
+
+        response = self.client.get(BASE_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data["results"],
+            [
+                {"name": "django", "posts_count": 2},
+                {"name": "pytest", "posts_count": 1},
+                {"name": "python", "posts_count": 1},
+            ],
+        )
+
+    def test_tag_list_autocompletes_prefix(self):
+        self.client.force_authenticate(self.normal_user)
+
+        response = self.client.get(f"{BASE_URL}?search=PY")
+
+        names = [tag["name"] for tag in response.data["results"]]
+        self.assertEqual(names, ["pytest", "python"])
+
+    def test_tag_autocomplete_uses_name_index(self):
+        queryset = TagCount.objects.filter(name__istartswith="py")
+
+        self.assertUsesIndex(queryset, "blog_tagcount_name_idx")
@@ -0,0 +1,23 @@
+from django.db import connection
+
+
+class QueryPlanMixin:
+    """
+    Assertions about the PostgreSQL query plan of a queryset.
+    """
+
+    def explain(self, queryset):
+        """
+        Return the plan of the queryset. Sequential scans are disabled since
+        test tables are tiny and the planner would otherwise prefer them.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute("SET enable_seqscan = off")
+            try:
+                return queryset.explain()
+            finally:
+                cursor.execute("RESET enable_seqscan")
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = self.explain(queryset)
+        self.assertIn(index_name, plan, f"{index_name} is not used by:\n{plan}")
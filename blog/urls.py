@@ -1,10 +1,14 @@
 from django.urls import include, path
 from rest_framework_nested.routers import DefaultRouter, NestedDefaultRouter
 
-from . import views
+from . import async_views, views
 
 router = DefaultRouter()
 router.register("post", views.PostViewSet, basename="posts")
+router.register("tags", views.TagViewSet, basename="tags")
+router.register(
+    "comments", views.CommentModerationViewSet, basename="comments-moderation"
+)
 
 comments_router = NestedDefaultRouter(router, "post", lookup="post")
 comments_router.register("comments", views.CommentViewSet, basename="comments")
@@ -12,4 +16,8 @@ comments_router.register("comments", views.CommentViewSet, basename="comments")
 urlpatterns = [
     path("", include(router.urls)),
     path("", include(comments_router.urls)),
+    path("async/post/", async_views.post_list),
+    path("async/post/<uuid:pk>/", async_views.post_detail),
+    path("async/post/<uuid:post_pk>/comments/", async_views.comment_list),
+    path("async/post/<uuid:post_pk>/comments/<uuid:pk>/", async_views.comment_detail),
 ]
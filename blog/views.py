@@ -1,16 +1,38 @@
-from django.core.mail import BadHeaderError, send_mail
-from django.db.models import Count
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models.functions import Greatest
+from django.http import Http404, StreamingHttpResponse
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import status
-from rest_framework.permissions import IsAuthenticated
+from rest_framework import exceptions, status
+from rest_framework.decorators import action
+from rest_framework.mixins import ListModelMixin
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
-from rest_framework.viewsets import ModelViewSet
+from rest_framework.viewsets import GenericViewSet, ModelViewSet
 
-from .filters import PostFilter
-from .models import Comment, Post
-from .pagination import DefaultPageNumberPagination
+from .bulk import create_comments, export_posts, import_posts, moderate_comments
+from .cache import cache_response
+from .conditional import conditional, conditional_on_data, get_etag
+from .filters import PostFilter, TagCountFilter
+from .models import Comment, OutboxEmail, Post, TagCount
+from .pagination import (
+    CommentCursorPagination,
+    DefaultPageNumberPagination,
+    PostCursorPagination,
+    PostSearchCursorPagination,
+)
+from .parsers import JSONLinesParser
 from .permissions import IsCommentOwnerOrReadOnly, IsOwnerOrReadOnly
-from .serializers import CommentSerializer, PostListSerializer, PostSerializer
+from .serializers import (
+    CommentModerationSerializer,
+    CommentSerializer,
+    PostFeedSerializer,
+    PostListSerializer,
+    PostSerializer,
+    TagCountSerializer,
+)
+from .slugs import forget_post_id, get_post_id
 
 
 class PostViewSet(ModelViewSet):
@@ -23,32 +45,140 @@ class PostViewSet(ModelViewSet):
     filter_backends = (DjangoFilterBackend,)
     filterset_class = PostFilter
 
+    @property
+    def paginator(self):
+        """
+        Use keyset pagination for search and when requested with ?pagination=cursor.
+        else, page number pagination.
+        """
+        if not hasattr(self, "_paginator"):
+            if self.request.query_params.get("search"):
+                self._paginator = PostSearchCursorPagination()
+            elif self.request.query_params.get("pagination") == "cursor":
+                self._paginator = PostCursorPagination()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+
+    def get_detail_version(self, request, *args, **kwargs):
+        """
+        Version of the post from its updated_at and comments count.
+        Comments only move comments_updated_at, so Last-Modified is the
+        latest of both.
+        """
+        try:
+            version = (
+                self.get_queryset()
+                .prefetch_related(None)
+                .filter(pk=kwargs["pk"])
+                .values_list(
+                    Greatest("updated_at", "comments_updated_at"), "comments_count"
+                )
+                .first()
+            )
+        except ValidationError:
+            return None
+        if version is None:
+            return None
+        return get_etag(request.get_full_path(), *version), version[0]
+
+    @cache_response
+    @conditional_on_data
+    def list(self, request, *args, **kwargs):
+        """
+        List posts from values() rows with PostFeedSerializer.
+        """
+        fields = self.get_sparse_fields()
+        queryset = self.filter_queryset(self.get_queryset()).prefetch_related(None)
+        # Cursor positions are read from the ordering columns and annotations
+        # such as the search rank.
+        ordering = [
+            name.lstrip("-") for name in getattr(self.paginator, "ordering", ())
+        ]
+        columns = PostFeedSerializer.get_values(
+            fields or PostListSerializer.Meta.fields
+        )
+        rows = queryset.values(
+            *dict.fromkeys([*columns, *ordering, *queryset.query.annotations])
+        )
+        page = self.paginate_queryset(rows)
+        return self.get_paginated_response(PostFeedSerializer(page, fields).data)
+
+    @cache_response
+    @conditional(get_detail_version)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path=r"by-slug/(?:(?P<author>[\w.@+-]+)/)?(?P<slug>[-\w]+)",
+    )
+    def by_slug(self, request, slug, author=None):
+        """
+        Retrieve the post of author with slug, or the oldest active post with
+        slug. A stale cached id finds no post, it is forgotten and the post
+        is looked up again.
+        """
+        for _ in range(2):
+            pk = get_post_id(author, slug)
+            if pk is None:
+                break
+            self.kwargs["pk"] = str(pk)
+            try:
+                return self.retrieve(request, pk=str(pk))
+            except Http404:
+                forget_post_id(author, slug)
+        raise Http404
+
     def create(self, request, *args, **kwargs):
         """
-        Overwrite creation to send email after successfull post creation.
+        Overwrite creation to queue email after successfull post creation.
         """
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        self.perform_create(serializer)
+        with transaction.atomic():
+            self.perform_create(serializer)
+            self._queue_mail(serializer.data["title"], request.user.email)
         headers = self.get_success_headers(serializer.data)
-        self._send_mail(serializer.data["title"], request.user.email)
         return Response(
             serializer.data, status=status.HTTP_201_CREATED, headers=headers
         )
 
-    def _send_mail(self, title, email):
+    def _queue_mail(self, title, email):
         """
-        Send email to the user that created the post.
+        Queue email to the user that created the post.
+        It is sent by the send_outbox command.
         """
-        try:
-            send_mail(
-                subject=f"Post created: {title}",
-                message="Post created",
-                from_email="sulav@admin.com",
-                recipient_list=[email],
-            )
-        except BadHeaderError:
-            return Response("Invalid header found")
+        OutboxEmail.objects.create(
+            subject=f"Post created: {title}",
+            message="Post created",
+            from_email="sulav@admin.com",
+            recipient=email,
+        )
+
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="import",
+        parser_classes=[JSONLinesParser],
+    )
+    def bulk_import(self, request):
+        """
+        Create posts from a JSON Lines body, one post per line.
+        """
+        created, errors = import_posts(request.data, request.user)
+        return Response({"created": created, "errors": errors})
+
+    @action(detail=False, methods=["get"], url_path="export")
+    def bulk_export(self, request):
+        """
+        Stream posts as JSON Lines, one post per line.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        return StreamingHttpResponse(
+            export_posts(queryset), content_type="application/x-ndjson"
+        )
 
     def get_permissions(self):
         """
@@ -63,20 +193,51 @@ class PostViewSet(ModelViewSet):
         """
         Return all posts if requested user have staff permission.
         else, active posts only.
+        Posts are retrieved with only what the requested fields need.
         """
-        if self.request.user.is_staff:
-            return (
-                Post.objects.select_related("author")
-                .prefetch_related("tags")
-                .annotate(comments_count=Count("comments"))
-                .order_by("-created_at")
-            )
-        return (
-            Post.objects.select_related("author")
-            .filter(is_active=True)
-            .annotate(comments_count=Count("comments"))
-            .order_by("-created_at")
-        )
+        queryset = Post.objects.feed_for(self.request.user)
+        if self.action == "by_slug":
+            # The post of a cached id must still have the slug.
+            queryset = queryset.filter(slug=self.kwargs["slug"])
+            if self.kwargs.get("author"):
+                queryset = queryset.filter(author__username=self.kwargs["author"])
+        detail = self.action in ("retrieve", "by_slug")
+        fields = self.get_sparse_fields() if detail else None
+        if fields is not None:
+            queryset = queryset.only_fields(fields)
+        return queryset
+
+    def get_sparse_fields(self):
+        """
+        Return names of the fields to serialize in serializer order, from
+        the comma separated ?fields= and ?exclude= parameters.
+        None when neither is given.
+        """
+        available = self.get_serializer_class().Meta.fields
+        fields = available
+        for param in ("fields", "exclude"):
+            value = self.request.query_params.get(param)
+            if value is None:
+                continue
+            names = {name.strip() for name in value.split(",") if name.strip()}
+            unknown = names - set(available)
+            if unknown:
+                raise exceptions.ValidationError(
+                    {param: [f"Unknown fields: {', '.join(sorted(unknown))}."]}
+                )
+            if param == "fields":
+                fields = [name for name in fields if name in names]
+            else:
+                fields = [name for name in fields if name not in names]
+        return None if fields is available else fields
+
+    def get_serializer(self, *args, **kwargs):
+        """
+        Serialize only the requested fields of retrieved posts.
+        """
+        if self.action in ("retrieve", "by_slug"):
+            kwargs.setdefault("fields", self.get_sparse_fields())
+        return super().get_serializer(*args, **kwargs)
 
     def get_serializer_context(self):
         """
@@ -91,13 +252,42 @@ class PostViewSet(ModelViewSet):
         Returns PostListSerializer wihout description in list
         PostSerializer with description in retriieve
         """
-        if self.request.method == "GET" and not self.kwargs.get("pk", ""):
+        if self.action == "list":
             return PostListSerializer
         return PostSerializer
 
 
 class CommentViewSet(ModelViewSet):
     serializer_class = CommentSerializer
+    pagination_class = CommentCursorPagination
+
+    def get_list_version(self, request, *args, **kwargs):
+        """
+        Version of the comments of a post, recorded on the post itself.
+        """
+        try:
+            version = (
+                Post.objects.filter(pk=kwargs["post_pk"])
+                .values_list("comments_updated_at", "comments_count", "created_at")
+                .first()
+            )
+        except ValidationError:
+            return None
+        if version is None:
+            return None
+        comments_updated_at, comments_count, created_at = version
+        # Staff users also see hidden comments.
+        etag = get_etag(
+            request.get_full_path(),
+            request.user.is_staff,
+            comments_updated_at,
+            comments_count,
+        )
+        return etag, comments_updated_at or created_at
+
+    @conditional(get_list_version)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
 
     def get_permissions(self):
         """
@@ -119,8 +309,113 @@ class CommentViewSet(ModelViewSet):
 
     def get_queryset(self):
         """
-        Returns filtered comments with passed in post pk
+        Returns filtered comments with passed in post pk, hidden comments to
+        staff users only.
         """
-        return Comment.objects.select_related("user", "post").filter(
-            post_id=self.kwargs["post_pk"]
+        return (
+            Comment.objects.visible_to(self.request.user)
+            .select_related("user", "post")
+            .filter(post_id=self.kwargs["post_pk"])
         )
+
+    @action(detail=False, methods=["post"], url_path="bulk")
+    def bulk_create(self, request, post_pk):
+        """
+        Create comments from a list of comments in one transaction.
+        Responds with the created comment or the errors of each item.
+        """
+        if not isinstance(request.data, list):
+            raise exceptions.ValidationError({"detail": "Expected a list of comments."})
+        if len(request.data) > settings.BLOG_BULK_COMMENTS_MAX:
+            raise exceptions.ValidationError(
+                {
+                    "detail": "Ensure there are no more than "
+                    f"{settings.BLOG_BULK_COMMENTS_MAX} comments."
+                }
+            )
+        try:
+            results = create_comments(request.data, post_pk, request.user)
+        except (Post.DoesNotExist, ValidationError):
+            raise Http404
+        return Response({"results": results})
+
+    def perform_create(self, serializer):
+        """
+        Create comment and increment comments count of its post.
+        """
+        with transaction.atomic():
+            serializer.save()
+            Post.objects.filter(pk=self.kwargs["post_pk"]).comments_changed(1)
+
+    def perform_update(self, serializer):
+        """
+        Update comment and record the change on its post.
+        """
+        with transaction.atomic():
+            serializer.save()
+            Post.objects.filter(pk=self.kwargs["post_pk"]).comments_changed()
+
+    def perform_destroy(self, instance):
+        """
+        Delete comment and decrement comments count of its post, hidden
+        comments are not counted.
+        """
+        with transaction.atomic():
+            instance.delete()
+            delta = 0 if instance.is_hidden else -1
+            Post.objects.filter(pk=instance.post_id).comments_changed(delta)
+
+
+class CommentModerationViewSet(GenericViewSet):
+    """
+    Staff actions on comments of any post, each in one transaction.
+    """
+
+    serializer_class = CommentModerationSerializer
+    permission_classes = (IsAdminUser,)
+
+    def moderate(self, request, operation):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = moderate_comments(serializer.validated_data["ids"], operation)
+        return Response({"results": results})
+
+    @action(detail=False, methods=["post"], url_path="delete")
+    def delete_comments(self, request):
+        """
+        Delete comments.
+        """
+        return self.moderate(request, "delete")
+
+    @action(detail=False, methods=["post"])
+    def hide(self, request):
+        """
+        Hide comments from non-staff users.
+        """
+        return self.moderate(request, "hide")
+
+    @action(detail=False, methods=["post"])
+    def unhide(self, request):
+        """
+        Show hidden comments again.
+        """
+        return self.moderate(request, "unhide")
+
+
+class TagViewSet(ListModelMixin, GenericViewSet):
+    """
+    Tags of active posts with their number of posts, most used first.
+    """
+
+    serializer_class = TagCountSerializer
+    pagination_class = DefaultPageNumberPagination
+    permission_classes = [IsAuthenticated]
+    filter_backends = (DjangoFilterBackend,)
+    filterset_class = TagCountFilter
+    queryset = TagCount.objects.filter(posts_count__gt=0).order_by(
+        "-posts_count", "name"
+    )
+
+    @cache_response
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
@@ -0,0 +1,6 @@
+"""
+PostgreSQL backend with connection health checks, reuse and query metrics.
+
+Set ``"ENGINE": "core.db"`` to use it. ``CONN_HEALTH_CHECKS`` behaves like
+the setting of the same name in Django 4.1.
+"""
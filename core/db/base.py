@@ -0,0 +1,52 @@
+from django.db.backends.postgresql import base
+
+from core.metrics import record_query, registry
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    Check persistent connections once per request before reusing them.
+
+    A connection is checked with ``is_usable`` before its first cursor in a
+    request and closed if the check fails, so the query opens a new one
+    instead of failing on a connection dropped by the server or a proxy.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.health_check_enabled = False
+        self.health_check_done = False
+        # Queries of requests are counted by core.metrics.
+        self.execute_wrappers.append(record_query)
+
+    def get_labels(self):
+        return (("alias", self.alias),)
+
+    def connect(self):
+        self.health_check_enabled = self.settings_dict.get("CONN_HEALTH_CHECKS", False)
+        # A new connection needs no check.
+        self.health_check_done = True
+        super().connect()
+        registry.increment("db_connections_opened_total", self.get_labels())
+
+    def close_if_health_check_failed(self):
+        if self.connection is None or self.health_check_done or self.in_atomic_block:
+            return
+        self.health_check_done = True
+        registry.increment("db_connections_reused_total", self.get_labels())
+        if self.health_check_enabled and not self.is_usable():
+            registry.increment("db_health_checks_failed_total", self.get_labels())
+            self.close()
+
+    def close_if_unusable_or_obsolete(self):
+        # Called when requests start and finish.
+        self.health_check_done = False
+        super().close_if_unusable_or_obsolete()
+
+    def _cursor(self, name=None):
+        self.close_if_health_check_failed()
+        return super()._cursor(name)
+
+    def set_autocommit(self, *args, **kwargs):
+        self.close_if_health_check_failed()
+        super().set_autocommit(*args, **kwargs)
@@ -0,0 +1,327 @@
+"""
+Per endpoint request metrics.
+
+Metrics are kept in the memory of each process, every worker serves its own.
+"""
+import asyncio
+import hmac
+import logging
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from threading import Lock
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.decorators import sync_and_async_middleware
+
+logger = logging.getLogger(__name__)
+
+# Name, help text and bucket upper bounds of each histogram.
+HISTOGRAMS = (
+    (
+        "http_request_queries",
+        "SQL queries per request.",
+        (1, 2, 3, 5, 8, 13, 21, 34, 55),
+    ),
+    (
+        "http_request_db_seconds",
+        "Time spent in SQL queries per request.",
+        (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+    ),
+    (
+        "http_request_serialize_seconds",
+        "Time spent building serializer data per request.",
+        (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+    ),
+    (
+        "http_request_render_seconds",
+        "Time spent rendering the response body per request.",
+        (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+    ),
+    (
+        "http_request_seconds",
+        "Total time per request.",
+        (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+    ),
+    (
+        "http_response_bytes",
+        "Response body size per request.",
+        (256, 1024, 4096, 16384, 65536, 262144, 1048576),
+    ),
+)
+
+# Name and help text of each counter.
+COUNTERS = (
+    ("db_connections_opened_total", "Database connections opened."),
+    (
+        "db_connections_reused_total",
+        "Requests served by an already open database connection.",
+    ),
+    (
+        "db_health_checks_failed_total",
+        "Persistent database connections closed by a failed health check.",
+    ),
+)
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+
+class Registry:
+    def __init__(self):
+        self.lock = Lock()
+        self.histograms = {}
+        self.counters = {}
+
+    def observe(self, labels, **values):
+        with self.lock:
+            for name, _, buckets in HISTOGRAMS:
+                if values.get(name) is None:
+                    continue
+                histogram = self.histograms.get((name, labels))
+                if histogram is None:
+                    histogram = self.histograms[name, labels] = Histogram(buckets)
+                histogram.observe(values[name])
+
+    def increment(self, name, labels):
+        with self.lock:
+            self.counters[name, labels] = self.counters.get((name, labels), 0) + 1
+
+    def clear(self):
+        with self.lock:
+            self.histograms.clear()
+            self.counters.clear()
+
+    def render(self):
+        """
+        Return all histograms and counters in the Prometheus text format.
+        """
+        lines = []
+        with self.lock:
+            for name, help_text, _ in HISTOGRAMS:
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+                for (histogram_name, labels), histogram in sorted(
+                    self.histograms.items()
+                ):
+                    if histogram_name != name:
+                        continue
+                    label_text = ",".join(f'{k}="{v}"' for k, v in labels)
+                    total = 0
+                    for bound, count in zip(
+                        histogram.buckets + ("+Inf",), histogram.counts
+                    ):
+                        total += count
+                        lines.append(
+                            f'{name}_bucket{{{label_text},le="{bound}"}} {total}'
+                        )
+                    lines.append(f"{name}_sum{{{label_text}}} {histogram.sum}")
+                    lines.append(f"{name}_count{{{label_text}}} {total}")
+            for name, help_text in COUNTERS:
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+                for (counter_name, labels), value in sorted(self.counters.items()):
+                    if counter_name != name:
+                        continue
+                    label_text = ",".join(f'{k}="{v}"' for k, v in labels)
+                    lines.append(f"{name}{{{label_text}}} {value}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+class QueryRecorder:
+    """
+    Database execute wrapper counting queries and their duration, and
+    serialization time of the current request.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0
+        self.serialize_seconds = None
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - start
+
+
+# Recorder of the current request. Context variables are copied to the
+# threads of sync_to_async, so queries of async views are recorded too.
+current_recorder = ContextVar("current_recorder", default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    """
+    Database execute wrapper of every connection, see core.db, recording
+    queries of the current request if any.
+    """
+    recorder = current_recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    return recorder(execute, sql, params, many, context)
+
+
+@contextmanager
+def record_serialization():
+    """
+    Add the time spent in the block to the serialization time of the
+    current request.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        recorder = current_recorder.get()
+        if recorder is not None:
+            recorder.serialize_seconds = (recorder.serialize_seconds or 0) + (
+                time.perf_counter() - start
+            )
+
+
+def get_labels(request):
+    """
+    Return view name and viewset action (or method) handling the request.
+    """
+    match = request.resolver_match
+    if match is None:
+        return (("view", "unresolved"), ("action", request.method.lower()))
+    actions = getattr(match.func, "actions", None) or {}
+    action = actions.get(request.method.lower(), request.method.lower())
+    return (("view", match.view_name), ("action", action))
+
+
+def get_query_budget(view, action):
+    """
+    Return the query budget of ``view:action`` or else ``view``, if any.
+    """
+    budgets = settings.QUERY_BUDGETS
+    return budgets.get(f"{view}:{action}", budgets.get(view))
+
+
+@sync_and_async_middleware
+class MetricsMiddleware:
+    """
+    Record queries, DB time, serialization time, render time and size of
+    every response.
+
+    Queries of streaming responses run after the middleware returns and are
+    not counted.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # Mark the instance as a coroutine function, like
+            # MiddlewareMixin, so async views are called without a thread.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        recorder, token, start = self.start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_recorder.reset(token)
+        return self.finish(request, response, recorder, start)
+
+    async def __acall__(self, request):
+        recorder, token, start = self.start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_recorder.reset(token)
+        return self.finish(request, response, recorder, start)
+
+    def start(self, request):
+        request._metrics_render_seconds = None
+        recorder = QueryRecorder()
+        return recorder, current_recorder.set(recorder), time.perf_counter()
+
+    def finish(self, request, response, recorder, start):
+        duration = time.perf_counter() - start
+        labels = get_labels(request)
+        size = None if response.streaming else len(response.content)
+        registry.observe(
+            labels,
+            http_request_queries=recorder.count,
+            http_request_db_seconds=recorder.duration,
+            http_request_serialize_seconds=recorder.serialize_seconds,
+            http_request_render_seconds=request._metrics_render_seconds,
+            http_request_seconds=duration,
+            http_response_bytes=size,
+        )
+        view, action = labels[0][1], labels[1][1]
+        logger.debug(
+            "%s %s: %d queries, %.1fms db, %.1fms total, %s bytes",
+            view,
+            action,
+            recorder.count,
+            recorder.duration * 1000,
+            duration * 1000,
+            size,
+        )
+
+        budget = get_query_budget(view, action)
+        if budget is not None and recorder.count > budget:
+            message = (
+                f"{view} {action} ran {recorder.count} queries, budget is {budget}"
+            )
+            if settings.QUERY_BUDGET_STRICT:
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
+
+    def process_template_response(self, request, response):
+        start = time.perf_counter()
+
+        def record(response):
+            request._metrics_render_seconds = time.perf_counter() - start
+
+        response.add_post_render_callback(record)
+        return response
+
+
+def is_metrics_allowed(request):
+    """
+    Whether the request may read the metrics: with the METRICS_TOKEN bearer
+    token when it is set, else from INTERNAL_IPS without going through a
+    proxy, which would make every request come from its address.
+    """
+    if settings.METRICS_TOKEN:
+        expected = f"Bearer {settings.METRICS_TOKEN}"
+        received = request.META.get("HTTP_AUTHORIZATION", "")
+        return hmac.compare_digest(received.encode(), expected.encode())
+    proxied = any(
+        header in request.META for header in ("HTTP_X_FORWARDED_FOR", "HTTP_FORWARDED")
+    )
+    return not proxied and request.META.get("REMOTE_ADDR") in settings.INTERNAL_IPS
+
+
+def metrics(request):
+    """
+    Serve the recorded metrics to allowed requests.
+    """
+    if not is_metrics_allowed(request):
+        return HttpResponseForbidden()
+    return HttpResponse(
+        registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
@@ -0,0 +1,37 @@
+"""
+JSON renderer encoding with orjson, when it is installed.
+"""
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    Render the same JSON as JSONRenderer with orjson.
+
+    UUIDs and datetimes are encoded by orjson, other types such as Decimal
+    and lazy strings by the DRF encoder. Falls back to JSONRenderer without
+    orjson, or when UNICODE_JSON, COMPACT_JSON or STRICT_JSON are changed
+    from their defaults, since orjson only writes compact UTF-8.
+    Indented output always uses 2 spaces.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or self.ensure_ascii or not self.compact or not self.strict:
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b""
+
+        option = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            option |= orjson.OPT_INDENT_2
+        ret = orjson.dumps(data, default=self.encoder_class().default, option=option)
+        # Escaped like JSONRenderer does, so the output is a JavaScript subset.
+        if b"\xe2\x80\xa8" in ret or b"\xe2\x80\xa9" in ret:
+            ret = ret.replace(b"\xe2\x80\xa8", b"\\u2028")
+            ret = ret.replace(b"\xe2\x80\xa9", b"\\u2029")
+        return ret
@@ -0,0 +1,30 @@
+"""
+Serializers recording the time spent building their data in the request
+metrics.
+"""
+from rest_framework import serializers
+
+from core.metrics import record_serialization
+
+
+class TimedListSerializer(serializers.ListSerializer):
+    """
+    ListSerializer recording the serialization time of the whole list.
+    """
+
+    @property
+    def data(self):
+        with record_serialization():
+            return super().data
+
+
+class TimedSerializerMixin:
+    """
+    Record the serialization time of the serializer data. Set
+    ``list_serializer_class = TimedListSerializer`` in Meta to record lists.
+    """
+
+    @property
+    def data(self):
+        with record_serialization():
+            return super().data
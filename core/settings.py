@@ -43,9 +43,9 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     # Third party apps
     "rest_framework",
-    "debug_toolbar",
     "taggit",
     "django_filters",
     "djoser",
@@ -55,7 +55,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
-    "debug_toolbar.middleware.DebugToolbarMiddleware",
+    "core.metrics.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -65,6 +65,10 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+if DEBUG:
+    INSTALLED_APPS.append("debug_toolbar")
+    MIDDLEWARE.insert(1, "debug_toolbar.middleware.DebugToolbarMiddleware")
+
 ROOT_URLCONF = "core.urls"
 
 TEMPLATES = [
@@ -91,12 +95,34 @@ WSGI_APPLICATION = "core.wsgi.application"
 
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.postgresql_psycopg2",
+        "ENGINE": "core.db",
         "NAME": os.getenv("POSTGRES_DATABASE_NAME"),
         "USER": os.getenv("POSTGRES_USER"),
         "PASSWORD": os.getenv("POSTGRES_PASSWORD"),
         "HOST": os.getenv("POSTGRES_HOST"),
         "PORT": os.getenv("POSTGRES_PORT"),
+        # Seconds a connection is kept open between requests, 0 closes it
+        # after every request.
+        "CONN_MAX_AGE": int(os.getenv("POSTGRES_CONN_MAX_AGE", "0")),
+        "CONN_HEALTH_CHECKS": os.getenv("POSTGRES_CONN_HEALTH_CHECKS", "False")
+        == "True",
+        # PgBouncer in transaction pooling mode can not keep server side
+        # cursors open across transactions.
+        "DISABLE_SERVER_SIDE_CURSORS": os.getenv("POSTGRES_PGBOUNCER", "False")
+        == "True",
+    }
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.0/topics/cache/
+
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.getenv("CACHE_LOCATION", ""),
     }
 }
 
@@ -150,8 +176,20 @@ INTERNAL_IPS = ["127.0.0.1"]
 # REST FRAMEWORK
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
-    )
+        # Use user.authentication.ClaimsJWTAuthentication to build users
+        # from token claims without a query.
+        "user.authentication.CachedJWTAuthentication",
+    ),
+    # Encode and decode JSON with orjson, when it is installed.
+    "DEFAULT_RENDERER_CLASSES": (
+        "core.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        "core.parsers.ORJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ),
 }
 
 SIMPLE_JWT = {
@@ -159,6 +197,9 @@ SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(days=1),
 }
 
+# Seconds the user of a token is cached for, changes to the user evict it.
+USER_AUTH_CACHE_TIMEOUT = 300
+
 DJOSER = {
     "USER_CREATE_PASSWORD_RETYPE": True,
 }
@@ -170,3 +211,35 @@ EMAIL_HOST = os.getenv("EMAIL_HOST")
 EMAIL_HOST_USER = os.getenv("EMAIL_HOST_USER")
 EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD")
 EMAIL_PORT = os.getenv("EMAIL_PORT")
+
+# BLOG
+# Paginated lists bigger than this use the planner's row estimate as count.
+BLOG_COUNT_EXACT_THRESHOLD = 100_000
+BLOG_COUNT_CACHE_TIMEOUT = 60
+# Seconds non-staff post list and detail responses are cached for.
+BLOG_RESPONSE_CACHE_TIMEOUT = 300
+# Slug to post id lookups of permalinks, cached per process and shared.
+BLOG_SLUG_CACHE_SIZE = 10_000
+BLOG_SLUG_CACHE_TIMEOUT = 3600
+# Maximum comments created or moderated per bulk request.
+BLOG_BULK_COMMENTS_MAX = 100
+
+# METRICS
+# Maximum queries of "<view name>:<action>" or "<view name>". Requests over
+# budget are logged, or raise QueryBudgetExceeded when QUERY_BUDGET_STRICT
+# (always on under `manage.py test`).
+QUERY_BUDGETS = {
+    "posts-list:list": 5,
+    "posts-detail:retrieve": 4,
+    # A stale cached slug costs two more queries.
+    "posts-by-slug:by_slug": 6,
+    "comments-list:list": 5,
+    "comments-detail:retrieve": 4,
+    "tags-list:list": 4,
+}
+QUERY_BUDGET_STRICT = False
+# Bearer token required to read /metrics/. Without it, metrics are served to
+# INTERNAL_IPS only and never through a proxy.
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+TEST_RUNNER = "core.test_runner.TestRunner"
@@ -0,0 +1,63 @@
+"""
+Settings for production deployments of the API.
+
+    DJANGO_SETTINGS_MODULE=core.settings_production gunicorn core.wsgi
+
+Only what the JWT authenticated JSON API needs is loaded. The admin,
+sessions, messages, CSRF and the debug toolbar are left out, and responses
+are rendered as JSON only.
+"""
+import os
+
+from core.settings import *  # noqa: F401,F403
+from core.settings import DATABASES, INSTALLED_APPS, REST_FRAMEWORK, TEMPLATES
+
+DEBUG = False
+
+ALLOWED_HOSTS = [host for host in os.getenv("ALLOWED_HOSTS", "").split(",") if host]
+
+INSTALLED_APPS = [
+    app
+    for app in INSTALLED_APPS
+    if app
+    not in (
+        "django.contrib.admin",
+        "django.contrib.sessions",
+        "django.contrib.messages",
+        "django.contrib.staticfiles",
+    )
+]
+
+# Connections are kept open and checked before reuse by default.
+DATABASES = {
+    "default": {
+        **DATABASES["default"],
+        "CONN_MAX_AGE": int(os.getenv("POSTGRES_CONN_MAX_AGE", "60")),
+        "CONN_HEALTH_CHECKS": os.getenv("POSTGRES_CONN_HEALTH_CHECKS", "True")
+        == "True",
+    }
+}
+
+# Cached responses are invalidated through the cache, so workers must share it.
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv(
+            "CACHE_BACKEND", "django.core.cache.backends.redis.RedisCache"
+        ),
+        "LOCATION": os.getenv("CACHE_LOCATION", "redis://127.0.0.1:6379/1"),
+    }
+}
+
+MIDDLEWARE = [
+    "core.metrics.MetricsMiddleware",
+    "django.middleware.security.SecurityMiddleware",
+    "django.middleware.common.CommonMiddleware",
+]
+
+# Templates are only used for emails.
+TEMPLATES = [{**TEMPLATES[0], "OPTIONS": {"context_processors": []}}]
+
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,
+    "DEFAULT_RENDERER_CLASSES": ("core.renderers.ORJSONRenderer",),
+}
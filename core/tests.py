@@ -0,0 +1,246 @@
+import asyncio
+import io
+import os
+import subprocess
+import sys
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal
+from unittest import mock
+
+from blog.models import Post
+from core.metrics import MetricsMiddleware, QueryBudgetExceeded, registry
+from core.parsers import ORJSONParser
+from core.renderers import ORJSONRenderer
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from django.utils.translation import gettext_lazy
+from rest_framework import status
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+from rest_framework.utils.serializer_helpers import ReturnList
+from rest_framework_simplejwt.tokens import AccessToken
+from user.models import User
+
+
+class TestMetrics(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(
+            username="test", email="test@mail.com", password="testuser"
+        )
+        self.post = Post.objects.create(
+            title="test", description="test", author=self.user
+        )
+        self.client.force_authenticate(self.user)
+        registry.clear()
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_request_metrics_are_recorded_per_view_and_action(self):
+        self.client.get("/api/post/")
+        self.client.get(f"/api/post/{self.post.id}/")
+
+        response = self.client.get("/metrics/", REMOTE_ADDR="127.0.0.1")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        text = response.content.decode()
+        self.assertIn("# TYPE http_request_queries histogram", text)
+        self.assertIn(
+            'http_request_queries_count{view="posts-list",action="list"} 1', text
+        )
+        self.assertIn(
+            'http_request_render_seconds_count{view="posts-detail",action="retrieve"} 1',
+            text,
+        )
+        self.assertIn(
+            'http_request_serialize_seconds_count{view="posts-list",action="list"} 1',
+            text,
+        )
+        self.assertIn('http_request_queries_bucket{view="posts-list"', text)
+        self.assertIn('http_response_bytes_sum{view="posts-list"', text)
+
+    async def test_async_view_metrics_are_recorded(self):
+        token = await asyncio.to_thread(AccessToken.for_user, self.user)
+
+        response = await self.async_client.get(
+            f"/api/async/post/{self.post.id}/", AUTHORIZATION=f"JWT {token}"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        text = registry.render()
+        labels = 'view="blog.async_views.post_detail",action="get"'
+        # User, post and tags, run in sync_to_async threads.
+        self.assertIn(f"http_request_queries_sum{{{labels}}} 3", text)
+        self.assertIn(f"http_request_serialize_seconds_count{{{labels}}} 1", text)
+
+    def test_middleware_runs_async_views_without_a_thread(self):
+        async def get_response(request):
+            pass
+
+        self.assertTrue(MetricsMiddleware.async_capable)
+        self.assertTrue(asyncio.iscoroutinefunction(MetricsMiddleware(get_response)))
+        self.assertFalse(asyncio.iscoroutinefunction(MetricsMiddleware(lambda r: r)))
+
+    def test_metrics_are_only_served_to_internal_ips(self):
+        response = self.client.get("/metrics/", REMOTE_ADDR="10.0.0.1")
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_metrics_are_not_served_through_a_proxy(self):
+        response = self.client.get(
+            "/metrics/", REMOTE_ADDR="127.0.0.1", HTTP_X_FORWARDED_FOR="10.0.0.1"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    @override_settings(METRICS_TOKEN="secret")
+    def test_metrics_require_token_when_set(self):
+        without_token = self.client.get("/metrics/", REMOTE_ADDR="127.0.0.1")
+        with_token = self.client.get(
+            "/metrics/", REMOTE_ADDR="10.0.0.1", HTTP_AUTHORIZATION="Bearer secret"
+        )
+
+        self.assertEqual(without_token.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(with_token.status_code, status.HTTP_200_OK)
+
+    @override_settings(QUERY_BUDGETS={"posts-list:list": 1})
+    def test_request_over_query_budget_fails(self):
+        with self.assertRaises(QueryBudgetExceeded):
+            self.client.get("/api/post/")
+
+    @override_settings(QUERY_BUDGETS={"posts-list": 1}, QUERY_BUDGET_STRICT=False)
+    def test_request_over_query_budget_is_logged(self):
+        with self.assertLogs("core.metrics", "WARNING"):
+            response = self.client.get("/api/post/")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class TestProductionSettings(SimpleTestCase):
+    def test_production_settings_pass_system_checks(self):
+        result = subprocess.run(
+            [sys.executable, "manage.py", "check"],
+            cwd=settings.BASE_DIR,
+            env={
+                **os.environ,
+                "DJANGO_SETTINGS_MODULE": "core.settings_production",
+            },
+            capture_output=True,
+            text=True,
+        )
+
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+
+class TestDatabaseConnections(TransactionTestCase):
+    labels = (("alias", "default"),)
+
+    def setUp(self):
+        connection.close()
+        registry.clear()
+
+    def tearDown(self):
+        # Reconnect with the default settings.
+        connection.close()
+
+    def get_count(self, name):
+        return registry.counters.get((name, self.labels), 0)
+
+    def run_request(self):
+        connection.close_if_unusable_or_obsolete()
+        User.objects.exists()
+
+    def test_connection_is_closed_after_each_request_by_default(self):
+        self.run_request()
+        self.run_request()
+
+        self.assertEqual(self.get_count("db_connections_opened_total"), 2)
+        self.assertEqual(self.get_count("db_connections_reused_total"), 0)
+
+    def test_persistent_connection_is_reused(self):
+        with mock.patch.dict(connection.settings_dict, {"CONN_MAX_AGE": None}):
+            self.run_request()
+            self.run_request()
+            self.run_request()
+
+        self.assertEqual(self.get_count("db_connections_opened_total"), 1)
+        self.assertIn(
+            'db_connections_reused_total{alias="default"} 2', registry.render()
+        )
+
+    def test_failed_health_check_reconnects(self):
+        with mock.patch.dict(
+            connection.settings_dict,
+            {"CONN_MAX_AGE": None, "CONN_HEALTH_CHECKS": True},
+        ):
+            self.run_request()
+            old_connection = connection.connection
+            with mock.patch.object(connection, "is_usable", return_value=False):
+                self.run_request()
+
+        self.assertIsNot(connection.connection, old_connection)
+        self.assertEqual(self.get_count("db_connections_opened_total"), 2)
+        self.assertEqual(self.get_count("db_health_checks_failed_total"), 1)
+
+    def test_health_check_runs_once_per_request(self):
+        with mock.patch.dict(
+            connection.settings_dict,
+            {"CONN_MAX_AGE": None, "CONN_HEALTH_CHECKS": True},
+        ):
+            self.run_request()
+            with mock.patch.object(
+                connection, "is_usable", return_value=True
+            ) as is_usable:
+                self.run_request()
+                User.objects.exists()
+
+        is_usable.assert_called_once()
+        self.assertEqual(self.get_count("db_connections_reused_total"), 1)
+
+
+class TestORJSONRenderer(SimpleTestCase):
+    data = {
+        "id": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+        "created_at": datetime(2022, 6, 1, 12, 30, 15, 1500, tzinfo=timezone.utc),
+        "price": Decimal("1.10"),
+        "text": "caf\u00e9 \u2028 \u2029",
+        "detail": gettext_lazy("Not found."),
+        1: ReturnList([{"tags": ["a", "b"]}], serializer=None),
+        "empty": None,
+    }
+
+    def test_renders_same_json_as_json_renderer(self):
+        self.assertEqual(
+            ORJSONRenderer().render(self.data), JSONRenderer().render(self.data)
+        )
+
+    def test_renders_indented_json(self):
+        rendered = ORJSONRenderer().render({"a": [1]}, "application/json; indent=4")
+
+        self.assertEqual(rendered, b'{\n  "a": [\n    1\n  ]\n}')
+
+    def test_falls_back_to_json_renderer_without_orjson(self):
+        with mock.patch("core.renderers.orjson", None):
+            rendered = ORJSONRenderer().render(self.data)
+
+        self.assertEqual(rendered, JSONRenderer().render(self.data))
+
+    def test_parses_json(self):
+        data = ORJSONParser().parse(io.BytesIO('{"text": "caf\u00e9"}'.encode()))
+
+        self.assertEqual(data, {"text": "caf\u00e9"})
+
+    def test_parse_error_is_raised_for_invalid_json(self):
+        with self.assertRaises(ParseError):
+            ORJSONParser().parse(io.BytesIO(b'{"text": NaN}'))
+
+    def test_falls_back_to_json_parser_for_other_encodings(self):
+        body = io.BytesIO('{"text": "caf\u00e9"}'.encode("latin-1"))
+
+        data = ORJSONParser().parse(body, parser_context={"encoding": "latin-1"})
+
+        self.assertEqual(data, {"text": "caf\u00e9"})
@@ -13,17 +13,29 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
-import debug_toolbar
+from django.apps import apps
 from django.conf import settings
-from django.contrib import admin
-from django.urls import include, path
+from django.urls import include, path, re_path
+
+from core.metrics import metrics
+from user.views import TokenObtainPairView, TokenRefreshView
 
 urlpatterns = [
-    path("admin/", admin.site.urls),
+    path("metrics/", metrics),
     path("api/", include("blog.urls")),
     path("auth/", include("djoser.urls")),
+    # Add and refresh user claims of the tokens, see user.authentication.
+    re_path(r"^auth/jwt/create/?", TokenObtainPairView.as_view(), name="jwt-create"),
+    re_path(r"^auth/jwt/refresh/?", TokenRefreshView.as_view(), name="jwt-refresh"),
     path("auth/", include("djoser.urls.jwt")),
 ]
 
+# Optional components are only imported when installed, see
+# core.settings_production.
+if apps.is_installed("django.contrib.admin"):
+    from django.contrib import admin
+
+    urlpatterns.insert(0, path("admin/", admin.site.urls))
+
 if settings.DEBUG:
     urlpatterns += [path("__debug__/", include("debug_toolbar.urls"))]
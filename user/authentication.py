@@ -0,0 +1,120 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+
+VERSION_KEY = "user:auth:{}:version"
+USER_KEY = "user:auth:{}:{}:{}"
+CLAIMS = ("username", "email", "is_staff")
+# Fields of cached users, everything permissions need and nothing secret.
+CACHED_FIELDS = CLAIMS + ("is_active",)
+
+
+def get_version(user_id):
+    """
+    Return current version of cached users for ``user_id``.
+    """
+    key = VERSION_KEY.format(user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, 1, None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(user_id):
+    """
+    Invalidate every cached user for ``user_id``.
+    """
+    key = VERSION_KEY.format(user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        get_version(user_id)
+
+
+class ReadOnlyUser(Exception):
+    """
+    Raised when saving or deleting a user built from the cache or token
+    claims, which only has the fields permissions need.
+    """
+
+
+def read_only(*args, **kwargs):
+    raise ReadOnlyUser(
+        "This user was built from the cache or token claims with only "
+        f"{', '.join(CACHED_FIELDS)} loaded and can not be saved or deleted. "
+        "Load it from the database to change it."
+    )
+
+
+def build_user(user_id, fields):
+    """
+    Return a user with only ``fields`` loaded, which can not be saved or
+    deleted.
+    """
+    user = get_user_model()(**{api_settings.USER_ID_FIELD: user_id}, **fields)
+    user.save = user.delete = read_only
+    return user
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that caches the user of each token for
+    ``USER_AUTH_CACHE_TIMEOUT`` seconds. Changes to the user evict it from
+    the cache, so every worker must share the cache for them to be seen
+    before the timeout.
+
+    Only safe methods get the cached user. Other requests may save the
+    user, e.g. djoser's ``/auth/users/me/``, and load the full row.
+    """
+
+    def authenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+
+        if request.method in SAFE_METHODS:
+            return self.get_user(validated_token), validated_token
+        return super().get_user(validated_token), validated_token
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        jti = validated_token.get(api_settings.JTI_CLAIM)
+        if user_id is None or jti is None:
+            return super().get_user(validated_token)
+
+        key = USER_KEY.format(user_id, jti, get_version(user_id))
+        fields = cache.get(key)
+        if fields is None:
+            user = super().get_user(validated_token)
+            fields = {field: getattr(user, field) for field in CACHED_FIELDS}
+            cache.set(key, fields, settings.USER_AUTH_CACHE_TIMEOUT)
+        return build_user(user_id, fields)
+
+
+class ClaimsJWTAuthentication(CachedJWTAuthentication):
+    """
+    Build the user from token claims without touching the database.
+
+    Claims are read again from the database when the access token is
+    refreshed, so changes to the user, including deactivation, are seen
+    after ``ACCESS_TOKEN_LIFETIME`` at most. Tokens without the claims fall
+    back to the cached lookup.
+    """
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None or any(claim not in validated_token for claim in CLAIMS):
+            return super().get_user(validated_token)
+
+        return build_user(
+            user_id,
+            {claim: validated_token[claim] for claim in CLAIMS} | {"is_active": True},
+        )
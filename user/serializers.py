@@ -0,0 +1,49 @@
+from django.contrib.auth import get_user_model
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.serializers import (
+    TokenObtainPairSerializer as BaseTokenObtainPairSerializer,
+)
+from rest_framework_simplejwt.serializers import (
+    TokenRefreshSerializer as BaseTokenRefreshSerializer,
+)
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .authentication import CLAIMS
+
+
+class TokenObtainPairSerializer(BaseTokenObtainPairSerializer):
+    """
+    Add the claims used by ClaimsJWTAuthentication to the tokens.
+    """
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        for claim in CLAIMS:
+            token[claim] = getattr(user, claim)
+        return token
+
+
+class TokenRefreshSerializer(BaseTokenRefreshSerializer):
+    """
+    Read the claims of refreshed access tokens from the database instead of
+    copying them from the refresh token, and refuse inactive users.
+    """
+
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        access = AccessToken(data["access"])
+        user = (
+            get_user_model()
+            .objects.filter(
+                **{api_settings.USER_ID_FIELD: access[api_settings.USER_ID_CLAIM]}
+            )
+            .first()
+        )
+        if user is None or not user.is_active:
+            raise InvalidToken("User not found or inactive.")
+        for claim in CLAIMS:
+            access[claim] = getattr(user, claim)
+        data["access"] = str(access)
+        return data
@@ -0,0 +1,14 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import bump_version
+from .models import User
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_auth_cache(sender, instance, **kwargs):
+    """
+    Drop cached users of every token when the user changes or is deleted.
+    """
+    bump_version(instance.pk)
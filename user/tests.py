@@ -1,3 +1,174 @@
-from django.test import TestCase
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIRequestFactory, APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+from user.authentication import (
+    CachedJWTAuthentication,
+    ClaimsJWTAuthentication,
+    ReadOnlyUser,
+    get_version,
+)
+from user.models import User
+from user.serializers import TokenObtainPairSerializer
 
-# Create your tests here.
+
+class TestCachedJWTAuthentication(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(
+            username="test", email="test@mail.com", password="testuser"
+        )
+        token = AccessToken.for_user(self.user)
+        self.request = APIRequestFactory().get("/", HTTP_AUTHORIZATION=f"JWT {token}")
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_user_is_loaded_once_per_token(self):
+        authentication = CachedJWTAuthentication()
+        with self.assertNumQueries(1):
+            user, _ = authentication.authenticate(self.request)
+        with self.assertNumQueries(0):
+            cached_user, _ = authentication.authenticate(self.request)
+        self.assertEqual(user, self.user)
+        self.assertEqual(cached_user, self.user)
+
+    def test_saving_user_evicts_cached_user(self):
+        authentication = CachedJWTAuthentication()
+        authentication.authenticate(self.request)
+
+        self.user.is_staff = True
+        self.user.save()
+
+        user, _ = authentication.authenticate(self.request)
+        self.assertTrue(user.is_staff)
+
+    def test_deactivated_user_is_rejected(self):
+        authentication = CachedJWTAuthentication()
+        authentication.authenticate(self.request)
+
+        self.user.is_active = False
+        self.user.save()
+
+        with self.assertRaises(AuthenticationFailed):
+            authentication.authenticate(self.request)
+
+    def test_cached_user_has_no_password(self):
+        authentication = CachedJWTAuthentication()
+        user, token = authentication.authenticate(self.request)
+
+        fields = cache.get(f"user:auth:{user.pk}:{token['jti']}:{get_version(user.pk)}")
+        self.assertEqual(
+            fields,
+            {
+                "username": "test",
+                "email": "test@mail.com",
+                "is_staff": False,
+                "is_active": True,
+            },
+        )
+        self.assertEqual(user.password, "")
+        with self.assertRaises(ReadOnlyUser):
+            user.save()
+
+    def test_unsafe_methods_load_full_user(self):
+        token = AccessToken.for_user(self.user)
+        request = APIRequestFactory().patch("/", HTTP_AUTHORIZATION=f"JWT {token}")
+
+        user, _ = CachedJWTAuthentication().authenticate(request)
+
+        self.assertEqual(user.password, "testuser")
+        user.save()
+
+    def test_deleted_user_is_rejected(self):
+        authentication = CachedJWTAuthentication()
+        authentication.authenticate(self.request)
+
+        self.user.delete()
+
+        with self.assertRaises(AuthenticationFailed):
+            authentication.authenticate(self.request)
+
+
+class TestClaimsJWTAuthentication(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(
+            username="test", email="test@mail.com", password="testuser", is_staff=True
+        )
+
+    def tearDown(self):
+        cache.clear()
+
+    def get_request(self, token):
+        return APIRequestFactory().get("/", HTTP_AUTHORIZATION=f"JWT {token}")
+
+    def test_user_is_built_from_claims(self):
+        token = TokenObtainPairSerializer.get_token(self.user).access_token
+        with self.assertNumQueries(0):
+            user, _ = ClaimsJWTAuthentication().authenticate(self.get_request(token))
+
+        self.assertEqual(user.pk, self.user.pk)
+        self.assertEqual(user.username, "test")
+        self.assertEqual(user.email, "test@mail.com")
+        self.assertTrue(user.is_staff)
+        self.assertTrue(user.is_authenticated)
+
+    def test_claims_user_can_not_be_saved(self):
+        token = TokenObtainPairSerializer.get_token(self.user).access_token
+        user, _ = ClaimsJWTAuthentication().authenticate(self.get_request(token))
+
+        with self.assertRaises(ReadOnlyUser):
+            user.save()
+        with self.assertRaises(ReadOnlyUser):
+            user.delete()
+        self.assertTrue(User.objects.filter(pk=self.user.pk, password="testuser"))
+
+    def test_token_without_claims_falls_back_to_database(self):
+        token = AccessToken.for_user(self.user)
+        with self.assertNumQueries(1):
+            user, _ = ClaimsJWTAuthentication().authenticate(self.get_request(token))
+        self.assertEqual(user, self.user)
+
+
+class TestTokenCreate(APITestCase):
+    def test_token_contains_user_claims(self):
+        user = User.objects.create(username="test", email="test@mail.com")
+        user.set_password("testuser")
+        user.save()
+
+        response = self.client.post(
+            "/auth/jwt/create/", {"username": "test", "password": "testuser"}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        token = AccessToken(response.data["access"])
+        self.assertEqual(token["username"], "test")
+        self.assertEqual(token["email"], "test@mail.com")
+        self.assertFalse(token["is_staff"])
+
+
+class TestTokenRefresh(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create(
+            username="test", email="test@mail.com", password="testuser", is_staff=True
+        )
+        self.refresh = str(TokenObtainPairSerializer.get_token(self.user))
+
+    def test_refreshed_token_claims_are_read_from_database(self):
+        self.user.is_staff = False
+        self.user.save()
+
+        response = self.client.post("/auth/jwt/refresh/", {"refresh": self.refresh})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        token = AccessToken(response.data["access"])
+        self.assertFalse(token["is_staff"])
+        self.assertEqual(token["user_id"], self.user.pk)
+
+    def test_inactive_user_can_not_refresh_token(self):
+        self.user.is_active = False
+        self.user.save()
+
+        response = self.client.post("/auth/jwt/refresh/", {"refresh": self.refresh})
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
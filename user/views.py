@@ -1,3 +1,14 @@
-from django.shortcuts import render
+from rest_framework_simplejwt.views import (
+    TokenObtainPairView as BaseTokenObtainPairView,
+)
+from rest_framework_simplejwt.views import TokenRefreshView as BaseTokenRefreshView
 
-# Create your views here.
+from .serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+
+
+class TokenObtainPairView(BaseTokenObtainPairView):
+    serializer_class = TokenObtainPairSerializer
+
+
+class TokenRefreshView(BaseTokenRefreshView):
+    serializer_class = TokenRefreshSerializer